@@ -0,0 +1,233 @@
+# api.py — headless HTTP/JSON API over the query layer (plain ASGI)
+"""
+Numbers for other services without rendering the dashboard:
+
+    python api.py --port 8600                 # needs uvicorn; or: uvicorn api:app
+    curl 'http://127.0.0.1:8600/v1/kpis?geo=EU27_2020&coicop=CP00'
+    curl -H 'Accept: application/vnd.apache.arrow.stream' \\
+         'http://127.0.0.1:8600/v1/series?geo=FR,DE&start=2020-01'
+
+Routes (GET/HEAD): /v1/meta, /v1/series, /v1/latest, /v1/kpis, /v1/quality.
+Filters: `geo` and `coicop` (codes or display names, repeated or comma-separated;
+none = all) and `start` / `end` ("YYYY-MM"). Tables are columnar JSON (gzip when
+the client accepts it) or, with `format=arrow` or an Arrow Accept header, an
+Arrow IPC stream.
+
+Responses are cached as encoded bytes per (data version, route, query,
+encoding, and weights version for /v1/kpis) and carry an ETag of that key, so a repeated query is answered from
+memory, or with 304 when the client sends If-None-Match. The dataset is the
+process-wide LiveDataset of query.py, shared with the app when both run in
+one process, and refreshed in the background like the app's.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+from pathlib import Path
+from urllib.parse import parse_qsl
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa  # Arrow IPC responses
+
+from filters import select
+from lru import LRUCache
+from query import QueryError, kpis, live_dataset, query_params, selection_key, weighted_aggregates, weights_at
+
+try:
+    import uvicorn
+except Exception:
+    uvicorn = None
+
+DATA_PATH = Path(os.environ.get("HICP_DATA", Path("data") / "data hicp.csv"))
+WEIGHTS_PATH = Path(os.environ.get("HICP_WEIGHTS", Path("data") / "hicp weights.csv"))
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+GZIP_MIN_BYTES = 1024
+FILTERS = ("geo", "coicop", "start", "end")
+TABLE_COLUMNS = ["date", "geo", "geo_name", "coicop", "coicop_name", "index", "mom_%", "yoy_%"]
+
+RESPONSES = LRUCache(maxsize=512)  # (version, route, query, encoding, weights) -> (body, content type, gzip)
+
+# ----- Routes: served version (refresh.DatasetVersion) + parsed query -> JSON-able dict or a table -----
+def _selection(dataset, q: dict):
+    params = query_params(dataset, q.get("geo"), q.get("coicop"),
+                          (q.get("start") or [None])[0], (q.get("end") or [None])[0])
+    return select(dataset, params), params
+
+def route_meta(state, q):
+    dataset = state.dataset
+    return dict(version=dataset.version, loaded_at=state.loaded_at,
+                months=[dataset.month_labels[0], dataset.month_labels[-1]] if len(dataset.months) else [],
+                geos=dict(zip(dataset.geos.tolist(), dataset.geo_names.tolist())),
+                coicops=dict(zip(dataset.coicops.tolist(), dataset.coicop_names.tolist())))
+
+def route_series(state, q):
+    sel, _ = _selection(state.dataset, q)
+    return sel.to_frame()[TABLE_COLUMNS]
+
+def route_latest(state, q):
+    sel, _ = _selection(state.dataset, q)
+    return sel.latest()[TABLE_COLUMNS]
+
+def route_kpis(state, q, weights):
+    dataset = state.dataset
+    sel, params = _selection(dataset, q)
+    agg = weighted_aggregates(sel, weights, selection_key(dataset, params))
+    k = kpis(sel, agg)
+    return dict(version=dataset.version, month=None if k["month"] is None else k["month"].strftime("%Y-%m"),
+                annual=_num(k["annual"]), monthly=_num(k["monthly"]), weighted=k["weighted"],
+                unweighted=list(agg.unweighted) if agg is not None else [])
+
+def route_quality(state, q):
+    report = state.quality
+    if report is None:
+        return dict(version=state.dataset.version, summary=None)
+    return dict(version=report.version, previous=report.previous, series=report.series,
+                cells=report.cells, summary=report.summary())
+
+ROUTES = {
+    "/v1/meta": route_meta,
+    "/v1/series": route_series,
+    "/v1/latest": route_latest,
+    "/v1/kpis": route_kpis,
+    "/v1/quality": route_quality,
+}
+WEIGHTED_ROUTES = {route_kpis}  # called with the weights, which are part of their cache key
+
+# ----- Encoding -----
+def _num(x) -> float | None:
+    return None if x is None or np.isnan(x) else float(x)
+
+def columns_json(df: pd.DataFrame) -> dict:
+    """Columnar JSON: {"rows": n, "columns": {name: [...]}}; months as "YYYY-MM", NaN as null."""
+    cols = {}
+    for name, col in df.items():
+        if pd.api.types.is_datetime64_any_dtype(col):
+            cols[name] = col.dt.strftime("%Y-%m").tolist()
+        elif pd.api.types.is_float_dtype(col):
+            a = col.to_numpy(float)
+            cols[name] = np.where(np.isnan(a), None, a).tolist()
+        else:
+            cols[name] = col.astype(str).tolist()
+    return dict(rows=len(df), columns=cols)
+
+def arrow_stream(df: pd.DataFrame) -> bytes:
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def encode(result, version: str, arrow: bool, gz: bool) -> tuple:
+    """(body, content type, gzipped) of a route result."""
+    if arrow and isinstance(result, pd.DataFrame):
+        return arrow_stream(result), ARROW_STREAM, False
+    doc = dict(version=version, **columns_json(result)) if isinstance(result, pd.DataFrame) else result
+    body = json.dumps(doc, separators=(",", ":"), allow_nan=False).encode("utf-8")
+    if gz and len(body) >= GZIP_MIN_BYTES:
+        return gzip.compress(body, compresslevel=6, mtime=0), "application/json", True
+    return body, "application/json", False
+
+# ----- ASGI -----
+def _error(status: int, message: str) -> tuple:
+    return status, [(b"content-type", b"application/json")], json.dumps({"error": message}).encode("utf-8")
+
+class HicpApi:
+    """ASGI app; `live` defaults to the shared LiveDataset of DATA_PATH, opened on first use."""
+
+    def __init__(self, path: Path = DATA_PATH, live=None):
+        self.path = Path(path)
+        self._live = live
+
+    @property
+    def live(self):
+        if self._live is None:
+            self._live = live_dataset(self.path)
+        return self._live
+
+    def prepare(self, method: str, path: str, query_string: bytes, headers: dict) -> tuple:
+        """
+        (response, None) when the request is answered without computing (errors,
+        304), else (None, (cache key, build, etag)).
+        """
+        route = ROUTES.get(path.rstrip("/") or "/")
+        if route is None:
+            return _error(404, f"unknown route {path}; try {', '.join(ROUTES)}"), None
+        if method not in ("GET", "HEAD"):
+            return _error(405, "only GET and HEAD"), None
+        q = {}
+        for k, v in parse_qsl(query_string.decode("latin-1")):
+            q.setdefault(k, []).extend(p for p in v.split(",") if p)
+        accept = headers.get(b"accept", b"").decode("latin-1")
+        arrow = q.pop("format", ["json"])[-1] == "arrow" or ARROW_STREAM in accept
+        gz = "gzip" in headers.get(b"accept-encoding", b"").decode("latin-1")
+        state = self.live.state  # pinned: key, etag and body all belong to one version
+        version = state.dataset.version
+        weights = weights_at(WEIGHTS_PATH) if route in WEIGHTED_ROUTES else None
+        # selections come back in axis order, so the order of geo / coicop values does not matter
+        key = (version, route.__name__, tuple(sorted((k, tuple(sorted(v))) for k, v in q.items() if k in FILTERS)),
+               arrow, gz, weights.version if weights is not None else None,
+               route is route_quality and state.quality is not None)  # the first report arrives later
+        etag = b'"' + hashlib.blake2b(repr(key).encode("utf-8"), digest_size=12).hexdigest().encode() + b'"'
+        if etag in (t.strip() for t in headers.get(b"if-none-match", b"").split(b",")):
+            return (304, [(b"etag", etag)], b""), None
+
+        def build():
+            return encode(route(state, q, weights) if route in WEIGHTED_ROUTES else route(state, q),
+                          version, arrow, gz)
+        return None, (key, build, etag)
+
+    @staticmethod
+    def response(cached: tuple, etag: bytes, version: str) -> tuple:
+        body, ctype, gzipped = cached
+        headers = [(b"content-type", ctype.encode()), (b"etag", etag), (b"cache-control", b"no-cache"),
+                   (b"vary", b"accept, accept-encoding"), (b"x-data-version", version.encode())]
+        if gzipped:
+            headers.append((b"content-encoding", b"gzip"))
+        return 200, headers, body
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await asyncio.to_thread(lambda: self.live)  # load before the first request
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+        headers = dict(scope.get("headers") or [])
+        out, pending = self.prepare(scope["method"], scope["path"], scope.get("query_string", b""), headers)
+        if pending is not None:
+            key, build, etag = pending
+            cached = RESPONSES.get(key)  # hit: no computation, no thread hop
+            try:
+                if cached is None:
+                    cached = await asyncio.to_thread(RESPONSES.get_or_build, key, build)
+                out = self.response(cached, etag, key[0])
+            except QueryError as exc:
+                out = _error(400, str(exc))
+        status, hdrs, body = out
+        hdrs.append((b"content-length", str(len(body)).encode()))
+        await send({"type": "http.response.start", "status": status, "headers": hdrs})
+        await send({"type": "http.response.body", "body": b"" if scope["method"] == "HEAD" else body})
+
+app = HicpApi()
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Serve the HICP query API (ASGI, via uvicorn).")
+    ap.add_argument("data", nargs="?", default=str(DATA_PATH), help="CSV or Parquet store (default: HICP_DATA)")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8600)
+    a = ap.parse_args(argv)
+    if uvicorn is None:
+        raise SystemExit("api.py needs an ASGI server: pip install uvicorn (or mount api:app in your own)")
+    uvicorn.run(HicpApi(Path(a.data)), host=a.host, port=a.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+# bench — headless benchmarks for the HICP dashboard (no Streamlit server needed)
@@ -0,0 +1,38 @@
+# bench/__main__.py — `python -m bench ...` (run from the app folder)
+from __future__ import annotations
+import argparse
+from pathlib import Path
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m bench", description="HICP dashboard benchmarks")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    g = sub.add_parser("generate", help="write a synthetic HICP CSV")
+    g.add_argument("out")
+    g.add_argument("--rows", type=int, default=100_000)
+    g.add_argument("--seed", type=int, default=0)
+
+    r = sub.add_parser("run", help="time the hot paths at one or more scales")
+    r.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    r.add_argument("--data-dir", default=str(Path("bench") / "data"))
+    r.add_argument("--repeat", type=int, default=5)
+    r.add_argument("--seed", type=int, default=0)
+    r.add_argument("--out", default="bench_results.json")
+
+    c = sub.add_parser("compare", help="compare two result files")
+    c.add_argument("base")
+    c.add_argument("new")
+
+    a = ap.parse_args(argv)
+    if a.cmd == "generate":
+        from bench.generate import generate_csv
+        print(generate_csv(Path(a.out), a.rows, seed=a.seed))
+    elif a.cmd == "run":
+        from bench.run import run
+        run(a.rows, Path(a.data_dir), Path(a.out), repeat=a.repeat, seed=a.seed)
+    else:
+        from bench.run import compare
+        compare(Path(a.base), Path(a.new))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# bench/generate.py — deterministic synthetic HICP CSVs at production-like scale
+from __future__ import annotations
+import math
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from ingest import COICOP_NAMES
+
+# EU/EEA geos of prc_hicp_midx (codes -> display names)
+GEOS = {
+    "EU27_2020": "EU", "EA20": "Euro area", "BE": "Belgium", "BG": "Bulgaria", "CZ": "Czechia",
+    "DK": "Denmark", "DE": "Germany", "EE": "Estonia", "IE": "Ireland", "EL": "Greece",
+    "ES": "Spain", "FR": "France", "HR": "Croatia", "IT": "Italy", "CY": "Cyprus",
+    "LV": "Latvia", "LT": "Lithuania", "LU": "Luxembourg", "HU": "Hungary", "MT": "Malta",
+    "NL": "Netherlands", "AT": "Austria", "PL": "Poland", "PT": "Portugal", "RO": "Romania",
+    "SI": "Slovenia", "SK": "Slovakia", "FI": "Finland", "SE": "Sweden", "IS": "Iceland",
+    "NO": "Norway", "CH": "Switzerland", "TR": "Türkiye", "MK": "North Macedonia",
+    "RS": "Serbia", "AL": "Albania", "ME": "Montenegro", "XK": "Kosovo",
+}
+START = pd.Period("1996-01", "M")
+MAX_MONTHS = 360  # 1996-01 .. 2025-12
+
+def coicop_codes(n: int) -> list:
+    """CP00 + divisions CP01..CP12, then groups CP011.., classes CP0111.. (COICOP-like tree)."""
+    codes = ["CP00"] + [f"CP{d:02d}" for d in range(1, 13)]
+    codes += [f"CP{d:02d}{g}" for d in range(1, 13) for g in range(1, 10)]
+    codes += [f"CP{d:02d}{g}{c}" for d in range(1, 13) for g in range(1, 10) for c in range(1, 10)]
+    if n > len(codes):
+        raise ValueError(f"at most {len(codes)} COICOP codes available")
+    return codes[:n]
+
+def dims_for(rows: int) -> tuple:
+    """(n_geos, n_coicops, n_months) whose product first reaches `rows`."""
+    months = min(MAX_MONTHS, max(rows, 1))
+    series = math.ceil(rows / months)
+    geos = min(len(GEOS), max(1, math.ceil(math.sqrt(series / 4))))
+    return geos, math.ceil(series / geos), months
+
+def generate_csv(path: Path, rows: int, seed: int = 0, missing: float = 0.001,
+                 chunk_series: int = 2_000) -> Path:
+    """Write `rows` observations in the app's CSV layout; same (rows, seed) -> same bytes."""
+    n_geo, n_coicop, n_months = dims_for(rows)
+    geos = list(GEOS)[:n_geo]
+    coicops = coicop_codes(n_coicop)
+    names = {c: COICOP_NAMES.get(c, f"COICOP {c}") for c in coicops}
+    months = pd.period_range(START, periods=n_months, freq="M")
+    years, mons = months.year.to_numpy(), months.month.to_numpy()
+    rng = np.random.default_rng(seed)
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    written = 0
+    pairs = [(g, c) for g in geos for c in coicops]
+    with open(path, "w", encoding="utf-8", newline="") as fh:
+        fh.write("[Year],[Month],[geo],[GeoName],[COICOP],[COICOP_Name],[Value]\r\n")
+        for i in range(0, len(pairs), chunk_series):
+            chunk = pairs[i:i + chunk_series]
+            k = len(chunk)
+            steps = rng.normal(0.0018, 0.006, size=(k, n_months))
+            season = 0.004 * np.sin(2 * np.pi * (mons - 1) / 12) * rng.uniform(0, 1, size=(k, 1))
+            level = 100 * np.exp(np.cumsum(steps, axis=1) + season)
+            level = np.round(level / level[:, [min(227, n_months - 1)]] * 100, 2)  # ~2015 = 100
+            level[rng.random(level.shape) < missing] = np.nan
+
+            take = min(k * n_months, rows - written)
+            g_codes = np.repeat([g for g, _ in chunk], n_months)[:take]
+            c_codes = np.repeat([c for _, c in chunk], n_months)[:take]
+            frame = pd.DataFrame({
+                "[Year]": np.tile(years, k)[:take],
+                "[Month]": np.tile(mons, k)[:take],
+                "[geo]": g_codes,
+                "[GeoName]": pd.Series(g_codes).map(GEOS).to_numpy(),
+                "[COICOP]": c_codes,
+                "[COICOP_Name]": pd.Series(c_codes).map(names).to_numpy(),
+                "[Value]": level.ravel()[:take],
+            })
+            frame.to_csv(fh, header=False, index=False, lineterminator="\r\n")
+            written += take
+            if written >= rows:
+                break
+    return path
+
+def synthetic_weights(geos, coicops, years, seed: int = 0) -> pd.DataFrame:
+    """Item weights (per mille, CP00 = 1000) and country weights, as weights.read_weights returns."""
+    rng = np.random.default_rng(seed)
+    g, c, y = (a.ravel() for a in np.meshgrid(geos, coicops, years, indexing="ij"))
+    items = pd.DataFrame({"year": y, "geo": g, "coicop": c,
+                          "weight": np.where(c == "CP00", 1000.0, rng.uniform(1, 250, len(g)))})
+    gy, yy = (a.ravel() for a in np.meshgrid(geos, years, indexing="ij"))
+    countries = pd.DataFrame({"year": yy, "geo": gy, "coicop": None,
+                              "weight": rng.uniform(1, 280, len(gy))})
+    return pd.concat([items, countries], ignore_index=True)
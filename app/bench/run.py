@@ -0,0 +1,201 @@
+# bench/run.py — timed, headless benchmarks of the app's hot paths
+from __future__ import annotations
+import dataclasses
+import gc
+import json
+import platform
+import statistics
+import subprocess
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from api import RESPONSES, HicpApi
+from bench.generate import generate_csv, synthetic_weights
+from cube import HicpCube
+from filters import ALLOWED, apply_filters, select as filters_select
+from export import available_formats, export_file
+from helpers import series_summary_table
+from loader import build_frame, load_cube, load_frame, read_csv, snapshot_path
+from store import ParquetStore, build_store
+from prerender import prerender
+from quality import quality_report
+from refresh import LiveDataset
+from snapshots import load_snapshot, version_dir, write_manifest, write_snapshot
+from tabs import RATE_LABELS, _line_chart_logic
+from transforms import TRANSFORMS
+from weights import HicpWeights, aggregate
+
+FACET_MODES = {
+    "overlay": (False, False),
+    "by_country": (True, False),
+    "by_category": (False, True),
+    "grid": (True, True),
+}
+
+def timeit(fn, repeat=5, setup=None) -> dict:
+    """Best/median/mean wall time of `fn(setup())` over `repeat` runs (setup not timed)."""
+    times = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        gc.collect()
+        t = time.perf_counter()
+        fn(arg) if setup else fn()
+        times.append(time.perf_counter() - t)
+    return dict(repeat=repeat, best=min(times), median=statistics.median(times),
+                mean=statistics.fmean(times))
+
+def _selections(cube) -> dict:
+    geos = cube.geo_options
+    cats = cube.coicop_options
+    ui_geos = [g for g in geos if g in ALLOWED] or geos[:7]
+    months = cube.months
+    return {
+        "default": dict(eff_geos=ui_geos[:1], eff_cats=cats[:1],
+                        dr_start=months[0], dr_end=months[-1]),
+        "ui_grid": dict(eff_geos=ui_geos[:7], eff_cats=cats[:12],
+                        dr_start=months[0], dr_end=months[-1]),
+        "window": dict(eff_geos=geos[:5], eff_cats=cats[:10],
+                       dr_start=months[max(0, len(months) - 60)], dr_end=months[-1]),
+        "everything": dict(eff_geos=geos, eff_cats=cats,
+                           dr_start=months[0], dr_end=months[-1]),
+    }
+
+def run_scale(csv: Path, repeat: int = 5) -> list:
+    """All benchmarks against one CSV; returns a list of result dicts."""
+    results = []
+
+    def record(name, stats, **extra):
+        results.append(dict(name=name, **stats, **extra))
+        print(f"  {name:<36} best {stats['best'] * 1e3:10.2f} ms")
+
+    snap = snapshot_path(csv)
+    cold_repeat = max(1, min(repeat, 3))
+    record("load.read_csv[pandas]", timeit(lambda: read_csv(csv, engine="pandas"), cold_repeat))
+    record("load.read_csv[pyarrow]", timeit(lambda: read_csv(csv, engine="pyarrow"), cold_repeat))
+    record("load.build_frame", timeit(lambda: build_frame(csv), cold_repeat))
+    record("load.load_frame[cold]", timeit(lambda _: load_frame(csv), cold_repeat,
+                                          setup=lambda: snap.unlink(missing_ok=True)))
+    record("load.load_frame[snapshot]", timeit(lambda: load_frame(csv), repeat))
+    record("load.load_cube[snapshot]", timeit(lambda: load_cube(csv), repeat))
+
+    cube = load_cube(csv)
+    record("sidebar.catalog",
+           timeit(lambda c: (c.month_labels, c.geo_options, c.coicop_options), repeat,
+                  setup=lambda: dataclasses.replace(cube)))
+
+    for label, params in _selections(cube).items():
+        rows = len(apply_filters(cube, params))
+        record(f"filters.apply_filters[{label}]",
+               timeit(lambda: apply_filters(cube, params), repeat), rows=rows)
+
+    params = _selections(cube)["ui_grid"]
+    f = cube.select(params["eff_geos"], params["eff_cats"],
+                    params["dr_start"], params["dr_end"]).to_frame(RATE_LABELS)
+    for mode, (sep_c, sep_cat) in FACET_MODES.items():
+        record(f"chart.line_chart_logic[{mode}]",
+               timeit(lambda: _line_chart_logic(f, "Annual inflation rate", "bench", sep_c, sep_cat,
+                                                params["eff_geos"], params["eff_cats"]), repeat),
+               rows=len(f))
+
+    views = csv.with_name(f"{csv.stem}.views")
+    fig_key = (cube.version, params["dr_start"], params["dr_end"], tuple(params["eff_geos"]),
+               tuple(params["eff_cats"]), False, False)
+    vdir = version_dir(cube.version, views)
+    vdir.mkdir(parents=True, exist_ok=True)
+    fig, extra = _line_chart_logic(f, "Annual inflation rate", "bench", False, False,
+                                   params["eff_geos"], params["eff_cats"])
+    write_manifest(vdir, dict([write_snapshot(vdir, "Annual inflation rate", fig_key, fig, extra, "bench")]))
+    record("chart.snapshot_load", timeit(lambda: load_snapshot("Annual inflation rate", fig_key, views), repeat))
+    record("prerender.standard_views", timeit(lambda: prerender(csv, root=views), cold_repeat))
+
+    grid = filters_select(cube, params)
+    for name, tr in TRANSFORMS.items():
+        record(f"transform[{name}]", timeit(lambda: tr.compute(grid), repeat), cells=int(grid.index.size))
+
+    everything = _selections(cube)["everything"]
+    sel = cube.select(everything["eff_geos"], everything["eff_cats"])
+    record("table.series_summary",
+           timeit(lambda: series_summary_table(sel.latest(RATE_LABELS)), repeat),
+           rows=int((sel.latest_positions() >= 0).sum()))
+
+    weights = HicpWeights.from_frame(synthetic_weights(
+        np.asarray(cube.geos, dtype=str), np.asarray(cube.coicops, dtype=str), np.unique(cube.months.year)))
+    for label, params in _selections(cube).items():
+        part = filters_select(cube, params)
+        record(f"weights.aggregate[{label}]", timeit(lambda: aggregate(part, weights), repeat),
+               cells=int(part.index.size))
+
+    revised = HicpCube.from_values(cube.geos, cube.geo_names, cube.coicops, cube.coicop_names, cube.months,
+                                   cube.index * np.where(np.arange(len(cube.months)) >= len(cube.months) - 24,
+                                                         1.001, 1.0), "revised")
+    record("quality.report", timeit(lambda: quality_report(cube), repeat), cells=int(cube.index.size))
+    record("quality.report[revisions]", timeit(lambda: quality_report(revised, cube), repeat),
+           cells=int(cube.index.size))
+
+    api = HicpApi(csv, live=LiveDataset(csv, interval=0))
+    qs = b"geo=" + ",".join(map(str, cube.geos[:3])).encode() + b"&coicop=" + str(cube.coicops[0]).encode()
+
+    def api_request():
+        _, (key, build, etag) = api.prepare("GET", "/v1/series", qs, {b"accept-encoding": b"gzip"})
+        return RESPONSES.get(key) or RESPONSES.get_or_build(key, build)
+    record("api.series[miss]", timeit(lambda _: api_request(), cold_repeat, setup=RESPONSES.clear))
+    record("api.series[hit]", timeit(api_request, repeat))
+
+    n_rows = int((~np.isnan(sel.index)).sum())
+    for fmt in available_formats():
+        record(f"export[{fmt}]", timeit(lambda: export_file(sel, fmt), cold_repeat), rows=n_rows)
+
+    root = csv.with_name(f"{csv.stem}.store")
+    record("store.build", timeit(lambda: build_store(csv, root), cold_repeat))
+    record("store.open", timeit(lambda: ParquetStore(root), repeat))
+    for label, params in _selections(cube).items():
+        # a fresh store per run so the selection cache does not hide the read
+        record(f"store.select[{label}]",
+               timeit(lambda s: filters_select(s, params), repeat, setup=lambda: ParquetStore(root)))
+    record("quality.report[store]", timeit(lambda: quality_report(ParquetStore(root)), cold_repeat))
+    return results
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                             text=True, check=True, cwd=Path(__file__).parent)
+        return out.stdout.strip()
+    except Exception:
+        return None
+
+def run(scales, data_dir: Path, out: Path | None = None, repeat: int = 5, seed: int = 0) -> dict:
+    report = dict(
+        commit=_git_commit(), timestamp=time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        python=platform.python_version(), pandas=pd.__version__, numpy=np.__version__,
+        machine=platform.machine(), seed=seed, scales=[],
+    )
+    for rows in scales:
+        csv = Path(data_dir) / f"hicp_{rows}_s{seed}.csv"
+        if not csv.is_file():
+            print(f"generating {csv} ...")
+            generate_csv(csv, rows, seed=seed)
+        print(f"rows={rows:,}")
+        report["scales"].append(dict(rows=rows, csv_bytes=csv.stat().st_size,
+                                     results=run_scale(csv, repeat)))
+    if out:
+        Path(out).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"wrote {out}")
+    return report
+
+def compare(base: Path, new: Path) -> list:
+    """Ratio new/base of best times per (rows, benchmark); <1 means faster."""
+    def index(path):
+        rep = json.loads(Path(path).read_text(encoding="utf-8"))
+        return rep, {(s["rows"], r["name"]): r["best"] for s in rep["scales"] for r in s["results"]}
+    rep_a, a = index(base)
+    rep_b, b = index(new)
+    print(f"{rep_a.get('commit')} -> {rep_b.get('commit')}")
+    rows = []
+    for key in sorted(a.keys() & b.keys()):
+        ratio = b[key] / a[key] if a[key] else float("nan")
+        rows.append(dict(rows=key[0], name=key[1], base=a[key], new=b[key], ratio=ratio))
+        print(f"  {key[0]:>10,} {key[1]:<36} {a[key] * 1e3:10.2f} -> {b[key] * 1e3:10.2f} ms  x{ratio:.2f}")
+    return rows
@@ -0,0 +1,262 @@
+# cube.py — dense geo × COICOP × month array model
+from __future__ import annotations
+from dataclasses import dataclass
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+RATE_GUARD = 500.0  # |rate| above this is treated as a data glitch
+
+def pct_change(values: np.ndarray, lag: int) -> np.ndarray:
+    """Rate vs. `lag` calendar months earlier along the last axis; NaN where either side is a gap."""
+    out = np.full(values.shape, np.nan)
+    if lag < values.shape[-1]:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out[..., lag:] = (values[..., lag:] / values[..., :-lag] - 1.0) * 100.0
+    out[np.abs(out) > RATE_GUARD] = np.nan
+    return out
+
+def duplicate_cells(g_idx, c_idx, t_idx, shape) -> np.ndarray:
+    """(k, 4) int array: (geo, coicop, month) position and row count of cells given more than once."""
+    if not len(g_idx):
+        return np.empty((0, 4), dtype=np.int64)
+    counts = np.bincount(np.ravel_multi_index((g_idx, c_idx, t_idx), shape), minlength=int(np.prod(shape)))
+    cells = np.flatnonzero(counts > 1)
+    return np.column_stack([*np.unravel_index(cells, shape), counts[cells]]).astype(np.int64)
+
+def take_padded(values: np.ndarray, *indexers) -> np.ndarray:
+    """
+    values[np.ix_(*indexers)], one index array per axis, where -1 (an unknown
+    code, month or year from get_indexer / searchsorted) gives NaN instead of
+    the last element: the values get a trailing NaN slot on every axis first.
+    """
+    padded = np.pad(values, [(0, 1)] * values.ndim, constant_values=np.nan)
+    return padded[np.ix_(*indexers)]
+
+def last_observed(values: np.ndarray) -> np.ndarray:
+    """For every month, the position of the newest non-NaN value at or before it (-1 if none)."""
+    pos = np.where(~np.isnan(values), np.arange(values.shape[-1], dtype=np.int32), np.int32(-1))
+    if pos.shape[-1]:
+        np.maximum.accumulate(pos, axis=-1, out=pos)
+    return pos
+
+class CubeAxes:
+    """
+    Catalog side of a cube: display-name lookups and month positions.
+    Needs `geo_names`, `coicop_names` and `months` on the instance.
+    """
+    @cached_property
+    def month_labels(self) -> list:
+        """"YYYY-MM" per month position, for the sidebar slider."""
+        return self.months.strftime("%Y-%m").tolist()
+
+    @cached_property
+    def geo_options(self) -> list:
+        return sorted(self._geo_lookup)
+
+    @cached_property
+    def coicop_options(self) -> list:
+        return sorted(self._coicop_lookup)
+
+    @cached_property
+    def _geo_lookup(self) -> dict:
+        return self._name_positions(self.geo_names)
+
+    @cached_property
+    def _coicop_lookup(self) -> dict:
+        return self._name_positions(self.coicop_names)
+
+    @staticmethod
+    def _name_positions(names: np.ndarray) -> dict:
+        out = {}
+        for pos, name in enumerate(names):
+            out.setdefault(name, []).append(pos)
+        return out
+
+    def month_offset(self, ts) -> int:
+        """Position of the month containing `ts` (may fall outside the axis)."""
+        if not len(self.months):
+            return 0
+        ts, t0 = pd.Timestamp(ts), self.months[0]
+        return (ts.year - t0.year) * 12 + (ts.month - t0.month)
+
+    def month_slice(self, start=None, end=None) -> slice:
+        n = len(self.months)
+        lo = 0 if start is None else min(max(self.month_offset(start), 0), n)
+        hi = n if end is None else min(max(self.month_offset(end) + 1, 0), n)
+        return slice(lo, max(lo, hi))
+
+@dataclass(frozen=True, eq=False)
+class HicpCube(CubeAxes):
+    """
+    Index values on a complete monthly calendar, shape (geo, coicop, month).
+    Missing observations are NaN, so month offsets are calendar offsets.
+    """
+    geos: np.ndarray          # geo codes (axis 0)
+    geo_names: np.ndarray     # display name per geo code
+    coicops: np.ndarray       # COICOP codes (axis 1)
+    coicop_names: np.ndarray  # display name per COICOP code
+    months: pd.DatetimeIndex  # month starts (axis 2), no gaps
+    index: np.ndarray         # float (G, C, T)
+    mom: np.ndarray           # MoM % (G, C, T)
+    yoy: np.ndarray           # YoY % (G, C, T)
+    version: str = ""         # data version the cube was built from
+    last_obs: np.ndarray | None = None  # int32 (G, C, T): newest observed month <= t, -1 if none
+    duplicates: tuple = ()    # (geo, coicop, "YYYY-MM", rows) given more than once in the source
+
+    def __post_init__(self):
+        if self.last_obs is None:
+            object.__setattr__(self, "last_obs", last_observed(self.index))
+        # cubes are shared by every session of the process: make them read-only
+        for a in (self.geos, self.geo_names, self.coicops, self.coicop_names,
+                  self.index, self.mom, self.yoy, self.last_obs):
+            a.flags.writeable = False
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, version: str = "") -> "HicpCube":
+        """Pivot a long frame (year, month, geo, geo_name, coicop, coicop_name, index)."""
+        g_idx, geos = _factorize(df["geo"])
+        c_idx, coicops = _factorize(df["coicop"])
+        ym = df["year"].to_numpy("int64") * 12 + df["month"].to_numpy("int64") - 1
+        t0 = int(ym.min()) if len(ym) else 0
+        t_idx = ym - t0
+        n_months = int(t_idx.max()) + 1 if len(ym) else 0
+
+        shape = (len(geos), len(coicops), n_months)
+        values = np.full(shape, np.nan)
+        values[g_idx, c_idx, t_idx] = df["index"].to_numpy(float)  # duplicates: last row wins
+        # recorded by build_frame (a frame from a cube has unique rows) + found here
+        duplicates = tuple(map(tuple, df.attrs.get("duplicates", ()))) + tuple(
+            (geos[g], coicops[c], f"{(t0 + t) // 12:04d}-{(t0 + t) % 12 + 1:02d}", int(n))
+            for g, c, t, n in duplicate_cells(g_idx, c_idx, t_idx, shape))
+
+        months = pd.date_range(pd.Timestamp(year=t0 // 12, month=t0 % 12 + 1, day=1),
+                               periods=n_months, freq="MS")
+        return cls.from_values(geos, _first_labels(df["geo_name"], g_idx),
+                               coicops, _first_labels(df["coicop_name"], c_idx),
+                               months, values, version, duplicates)
+
+    @classmethod
+    def from_values(cls, geos, geo_names, coicops, coicop_names, months, values,
+                    version: str = "", duplicates: tuple = ()) -> "HicpCube":
+        return cls(geos, geo_names, coicops, coicop_names, months, values,
+                   pct_change(values, 1), pct_change(values, 12), version, duplicates=duplicates)
+
+    # ----- Slicing -----
+    def select(self, geo_names=None, coicop_names=None, start=None, end=None) -> "HicpCube":
+        """
+        Sub-cube for the given display names and [start, end] month range.
+        Cost scales with the selection; contiguous selections are views.
+        """
+        gi = _gather(self._geo_lookup, geo_names, len(self.geos))
+        ci = _gather(self._coicop_lookup, coicop_names, len(self.coicops))
+        t = self.month_slice(start, end)
+        if isinstance(gi, slice) or isinstance(ci, slice):
+            pick = (gi, ci, t)                        # a view when both are slices
+        else:
+            pick = (gi[:, None], ci[None, :], t)      # gathers only the selected cells
+        # re-base the "newest observation so far" table on the window start
+        last_obs = self.last_obs[pick] - np.int32(t.start)
+        last_obs[last_obs < 0] = -1
+        return HicpCube(self.geos[gi], self.geo_names[gi], self.coicops[ci], self.coicop_names[ci],
+                        self.months[t], self.index[pick], self.mom[pick], self.yoy[pick],
+                        self.version, last_obs)
+
+    def latest_month(self) -> int | None:
+        """Position of the newest month holding any observation."""
+        has = ~np.isnan(self.index).all(axis=(0, 1))
+        return int(np.flatnonzero(has)[-1]) if has.any() else None
+
+    @property
+    def empty(self) -> bool:
+        return self.latest_month() is None
+
+    def latest_positions(self) -> np.ndarray:
+        """(G, C) month position of each series' newest observation, -1 if none."""
+        if not len(self.months):
+            return np.full(self.index.shape[:2], -1, dtype=np.int32)
+        return self.last_obs[..., -1]
+
+    def latest(self, rate_labels: dict | None = None) -> pd.DataFrame:
+        """One row per observed series with its newest observation (O(series), no sorting)."""
+        g, c = np.nonzero(self.latest_positions() >= 0)
+        t = self.latest_positions()[g, c]
+        out = pd.DataFrame({
+            "geo": _categorical(self.geos, g),
+            "geo_name": _categorical(self.geo_names, g),
+            "coicop": _categorical(self.coicops, c),
+            "coicop_name": _categorical(self.coicop_names, c),
+            "date": self.months[t],
+            "index": self.index[g, c, t],
+            "mom_%": self.mom[g, c, t],
+            "yoy_%": self.yoy[g, c, t],
+        })
+        if rate_labels:
+            out.columns = [rate_labels.get(c, c) for c in out.columns]
+        return out
+
+    def arrays(self) -> dict:
+        """The cube's ndarrays by name (for memory accounting)."""
+        return dict(geos=self.geos, geo_names=self.geo_names, coicops=self.coicops,
+                    coicop_names=self.coicop_names, months=self.months.values,
+                    index=self.index, mom=self.mom, yoy=self.yoy, last_obs=self.last_obs)
+
+    def observed(self, values: np.ndarray) -> np.ndarray:
+        """`values` (G, C, T) at the rows of `to_frame()`, e.g. to add a derived column."""
+        return values[~np.isnan(self.index)]
+
+    # ----- Edges (Plotly, downloads) -----
+    def to_frame(self, rate_labels: dict | None = None) -> pd.DataFrame:
+        """
+        Long frame sorted by (geo, coicop, date), one row per observed cell.
+        `rate_labels` renames `mom_%` / `yoy_%` (e.g. to display names) without copying.
+        """
+        g, c, t = np.nonzero(~np.isnan(self.index))
+        months = self.months[t]
+        out = pd.DataFrame({
+            "year": pd.array(months.year, dtype="Int64"),
+            "month": pd.array(months.month, dtype="Int64"),
+            "geo": _categorical(self.geos, g),
+            "geo_name": _categorical(self.geo_names, g),
+            "coicop": _categorical(self.coicops, c),
+            "coicop_name": _categorical(self.coicop_names, c),
+            "index": self.index[g, c, t],
+            "date": months,
+            "mom_%": self.mom[g, c, t],
+            "yoy_%": self.yoy[g, c, t],
+        })
+        if rate_labels:
+            out.columns = [rate_labels.get(c, c) for c in out.columns]
+        return out
+
+def _gather(lookup: dict, wanted, n: int):
+    """Axis positions for the wanted names: a slice when contiguous, else a sorted array."""
+    if wanted is None:
+        return slice(0, n)
+    pos = np.array(sorted({p for name in wanted for p in lookup.get(name, ())}), dtype=np.intp)
+    if len(pos) and pos[-1] - pos[0] + 1 == len(pos):
+        return slice(int(pos[0]), int(pos[-1]) + 1)
+    return pos
+
+def _factorize(col: pd.Series) -> tuple:
+    """(codes, sorted labels as str objects); categoricals are recoded without per-row strings."""
+    if isinstance(col.dtype, pd.CategoricalDtype) and not col.isna().any():
+        codes = col.cat.codes.to_numpy()
+        labels = np.asarray(col.cat.categories.astype(str), dtype=object)
+        used = np.flatnonzero(np.bincount(codes, minlength=len(labels)))
+        order = used[np.argsort(labels[used], kind="stable")]
+        recode = np.full(len(labels), -1, dtype=np.intp)
+        recode[order] = np.arange(len(order))
+        return recode[codes], labels[order]
+    codes, labels = pd.factorize(col.astype(str), sort=True)
+    return codes, np.asarray(labels, dtype=object)
+
+def _first_labels(col: pd.Series, codes: np.ndarray) -> np.ndarray:
+    """Label of the first row of each code (display name per axis position)."""
+    _, first = np.unique(codes, return_index=True)
+    return np.asarray(col.iloc[first].astype(str), dtype=object)
+
+def _categorical(labels: np.ndarray, positions: np.ndarray) -> pd.Categorical:
+    cats = pd.Index(sorted(set(labels)))
+    return pd.Categorical.from_codes(cats.get_indexer(labels)[positions], categories=cats)
@@ -0,0 +1,51 @@
+# downsample.py — shape-preserving point reduction for long line series
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+
+def minmax_downsample(f: pd.DataFrame, ycol: str, max_points: int,
+                      by=("geo_name", "coicop_name")) -> pd.DataFrame:
+    """
+    Per series (rows ordered by date within each `by` group), keep one NaN row
+    per run of missing values, so line gaps stay visible (the longest runs, at
+    most max_points // 2), then split the values into equal buckets and keep
+    each bucket's min and max plus both ends, so peaks and troughs survive.
+    Series at or under `max_points` are kept whole; longer ones come out at
+    `max_points` rows or fewer (for max_points >= 8).
+    """
+    if f.empty:
+        return f
+    g = f.groupby(list(by), sort=False, observed=True)
+    sid = g.ngroup().to_numpy()
+    counts = np.bincount(sid)
+    n = counts[sid]
+    if n.max() <= max_points:
+        return f
+
+    within = g.cumcount().to_numpy()
+    y = f[ycol].to_numpy(float)
+    valid = ~np.isnan(y)
+    long_ = n > max_points
+
+    # runs of NaN rows, in (series, date) order
+    order = np.lexsort((within, sid))
+    s_sid, s_nan = sid[order], ~valid[order]
+    is_start = s_nan & np.r_[True, (s_sid[1:] != s_sid[:-1]) | ~s_nan[:-1]]
+    starts = np.flatnonzero(is_start)
+    run_len = np.bincount((np.cumsum(is_start) - 1)[s_nan], minlength=len(starts))
+    run_sid = s_sid[starts]
+    by_len = np.lexsort((-run_len, run_sid))  # each series' runs, longest first
+    first = np.searchsorted(run_sid[by_len], run_sid[by_len], side="left")
+    marked = np.zeros(len(starts), dtype=bool)
+    marked[by_len] = np.arange(len(by_len)) - first < max_points // 2
+    markers = np.bincount(run_sid[marked], minlength=len(counts))
+
+    keep = ~long_ | (valid & ((within == 0) | (within == n - 1)))
+    keep[order[starts[marked]]] = True
+    n_buckets = np.maximum(1, (max_points - markers - 2) // 2)[sid]  # what the markers and ends leave
+    bucket = sid.astype(np.int64) * max_points + within * n_buckets // n
+    sub = pd.Series(y[long_ & valid], index=np.flatnonzero(long_ & valid))
+    keys = bucket[sub.index]
+    keep[sub.groupby(keys).idxmin().to_numpy()] = True
+    keep[sub.groupby(keys).idxmax().to_numpy()] = True
+    return f.iloc[np.flatnonzero(keep)]
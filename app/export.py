@@ -0,0 +1,117 @@
+# export.py — lazy, chunked exports of the filtered selection
+"""
+Exports are written straight from the cube in month blocks, so no full-size
+frame of the selection is built. The download is not streamed: st.download_button
+needs the whole file as bytes, so peak memory is one block of rows plus the
+full encoded file. The file is only produced when the user asks for it.
+"""
+from __future__ import annotations
+import gzip
+import io
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from lru import LRUCache
+from timing import span
+
+EXPORT_COLUMNS = ["Date","Country/Regions","Categories","Index (2015=100)",
+                  "Monthly inflation rate","Annual inflation rate"]
+ROWS_PER_BATCH = 100_000  # cube cells per block
+TABLES = LRUCache(maxsize=8)  # selection key -> filtered_table frame
+
+# label -> (file extension, mime type)
+FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "CSV (gzip)": ("csv.gz", "application/gzip"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+    "Arrow IPC": ("arrow", "application/vnd.apache.arrow.file"),
+}
+
+def available_formats() -> list:
+    return list(FORMATS)
+
+def iter_batches(cube, rows_per_batch: int = ROWS_PER_BATCH):
+    """
+    Yield DataFrames with EXPORT_COLUMNS, ordered by (Date, Country/Regions,
+    Categories) like the on-screen table; one block of months at a time.
+    """
+    g_order = np.argsort(cube.geo_names, kind="stable")
+    c_order = np.argsort(cube.coicop_names, kind="stable")
+    geo_names = cube.geo_names[g_order]
+    coicop_names = cube.coicop_names[c_order]
+    months_per_batch = max(1, rows_per_batch // max(1, len(g_order) * len(c_order)))
+    for t0 in range(0, len(cube.months), months_per_batch):
+        t = slice(t0, t0 + months_per_batch)
+        # (month, geo, coicop) so nonzero() walks rows in output order
+        idx = cube.index[g_order[:, None], c_order[None, :], t].transpose(2, 0, 1)
+        tt, g, c = np.nonzero(~np.isnan(idx))
+        if not len(tt):
+            continue
+        mom = cube.mom[g_order[:, None], c_order[None, :], t].transpose(2, 0, 1)
+        yoy = cube.yoy[g_order[:, None], c_order[None, :], t].transpose(2, 0, 1)
+        yield pd.DataFrame({
+            "Date": cube.months[t][tt],
+            "Country/Regions": geo_names[g],
+            "Categories": coicop_names[c],
+            "Index (2015=100)": idx[tt, g, c],
+            "Monthly inflation rate": mom[tt, g, c],
+            "Annual inflation rate": yoy[tt, g, c],
+        })
+
+def filtered_table(cube) -> pd.DataFrame:
+    """The selection as shown under every view: EXPORT_COLUMNS in export order, straight from the cube."""
+    parts = list(iter_batches(cube))
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=EXPORT_COLUMNS)
+
+def _schema():
+    return pa.schema([
+        ("Date", pa.date32()), ("Country/Regions", pa.string()), ("Categories", pa.string()),
+        ("Index (2015=100)", pa.float64()), ("Monthly inflation rate", pa.float64()),
+        ("Annual inflation rate", pa.float64()),
+    ])
+
+def _record_batches(cube):
+    schema = _schema()
+    for frame in iter_batches(cube):
+        yield pa.RecordBatch.from_pandas(frame, schema=schema, preserve_index=False)
+
+def write_export(cube, fmt: str, sink) -> None:
+    """Write the selection in `fmt` (a FORMATS label) into the binary file object `sink`, a month block at a time."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt!r}")
+    schema = _schema()
+    if fmt == "Parquet":
+        with pq.ParquetWriter(sink, schema, compression="zstd") as writer:
+            for batch in _record_batches(cube):
+                writer.write_batch(batch)
+    elif fmt == "Arrow IPC":
+        with pa.ipc.new_file(sink, schema) as writer:
+            for batch in _record_batches(cube):
+                writer.write_batch(batch)
+    else:
+        gz = gzip.GzipFile(fileobj=sink, mode="wb", compresslevel=6, mtime=0) if fmt == "CSV (gzip)" else None
+        out = pa.PythonFile(gz or sink, mode="w")
+        options = pa_csv.WriteOptions(quoting_style="needed")
+        with pa_csv.CSVWriter(out, schema, write_options=options) as writer:
+            for batch in _record_batches(cube):
+                writer.write_batch(batch)
+        if gz is not None:
+            gz.close()  # writes the gzip trailer; `sink` itself stays open
+
+def export_file(cube, fmt: str) -> bytes:
+    """The finished export as bytes (what st.download_button accepts from a callable)."""
+    sink = io.BytesIO()
+    with span("export", format=fmt) as s:
+        write_export(cube, fmt, sink)
+        s.count(bytes=sink.tell())
+    return sink.getvalue()
+
+def file_name(fmt: str, stem: str = "hicp_filtered") -> str:
+    return f"{stem}.{FORMATS[fmt][0]}"
+
+def mime(fmt: str) -> str:
+    return FORMATS[fmt][1]
@@ -0,0 +1,31 @@
+# figcache.py — process-wide LRU of built Plotly figures
+from __future__ import annotations
+
+import plotly.io as pio
+
+from lru import LRUCache
+
+class FigureCache(LRUCache):
+    """
+    Figures are stored as JSON (compact, immutable) and re-hydrated on a hit,
+    which is far cheaper than a plotly.express build and lets callers mutate
+    the returned figure freely. Shared by all sessions of the process.
+    """
+
+    def get_or_build(self, key, build):
+        """`build()` must return (fig, extra); returns (fresh fig, extra)."""
+        built = []
+
+        def build_json():
+            fig, extra = build()
+            built.append(fig)  # a miss hands back the figure it just built
+            return fig.to_json(), extra
+
+        fig_json, extra = super().get_or_build(key, build_json)
+        return (built[0] if built else pio.from_json(fig_json)), extra
+
+    def nbytes(self) -> int:
+        with self._lock:
+            return sum(len(j) for j, _ in self._items.values())
+
+FIGURES = FigureCache()
@@ -5,17 +5,20 @@ import pandas as pd
 
 ALLOWED = {"EU","France","Germany","Italy","Netherlands","Poland","Spain"}
 
-def build_sidebar(df):
+def month_bounds(m_from: str, m_to: str) -> tuple:
+    """("YYYY-MM", "YYYY-MM") -> (first instant, last instant) of the range."""
+    return pd.Period(m_from, "M").to_timestamp(how="start"), pd.Period(m_to, "M").to_timestamp(how="end")
+
+def build_sidebar(cube, allowed=ALLOWED):
+    """Sidebar widgets -> filter params; `allowed=None` offers every geo in the catalog."""
     with st.sidebar:
         st.header("Filters")
-        months = df["date"].dt.to_period("M").astype(str).sort_values().unique().tolist()
+        months = cube.month_labels
         m_from, m_to = st.select_slider("Date range (month)", options=months, value=(months[0], months[-1]))
-        dr_start = pd.Period(m_from, "M").to_timestamp(how="start")
-        dr_end   = pd.Period(m_to,   "M").to_timestamp(how="end")
+        dr_start, dr_end = month_bounds(m_from, m_to)
 
-        geos_all = sorted(df["geo_name"].cat.categories.tolist())
-        geos = [g for g in geos_all if g in ALLOWED]
-        cats = sorted(df["coicop_name"].cat.categories.tolist())
+        geos = [g for g in cube.geo_options if allowed is None or g in allowed]
+        cats = cube.coicop_options
 
         default_geo = ["EU"] if "EU" in geos else ([geos[0]] if geos else [])
         default_cat = ["All-items HICP"] if "All-items HICP" in cats else ([cats[0]] if cats else [])
@@ -35,10 +38,10 @@ def build_sidebar(df):
         separate_categories=separate_categories,
     )
 
-def apply_filters(df, params):
-    mask = (
-        df["date"].between(params["dr_start"], params["dr_end"])
-        & df["geo_name"].isin(params["eff_geos"])
-        & df["coicop_name"].isin(params["eff_cats"])
-    )
-    return df.loc[mask].copy()
+def select(cube, params):
+    """Sub-cube for the sidebar selection (axis slicing, no row masks)."""
+    return cube.select(params["eff_geos"], params["eff_cats"], params["dr_start"], params["dr_end"])
+
+def apply_filters(cube, params):
+    """Long frame of the selection, for Plotly and the table/download."""
+    return select(cube, params).to_frame()
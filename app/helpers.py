@@ -1,40 +1,65 @@
 # helpers.py  — theme, colors, flags, legend-table, utilities
 from __future__ import annotations
+import base64
+import html
+import io
 import os
+import threading
 import plotly.express as px
 import plotly.graph_objects as go
 import plotly.io as pio
 import streamlit as st
 
 try:
-    from PIL import Image  # used for embedding flag PNGs
+    from PIL import Image  # optional: shrinks flag PNGs before they are embedded
 except Exception:
     Image = None
+
 # helpers.py
+from pathlib import Path
 import streamlit.components.v1 as components
+from plotly.offline import get_plotlyjs, get_plotlyjs_version
+from lru import LRUCache
+from timing import span
+
+_SCROLLABLE_PLOT_DIR = Path(__file__).parent / "components" / "scrollable_plot"
+_scrollable_plot = components.declare_component("scrollable_plot", path=str(_SCROLLABLE_PLOT_DIR))
+PLOTLY_BUNDLE = _SCROLLABLE_PLOT_DIR / "plotly.min.js"
+
+def write_plotly_bundle(path: Path = PLOTLY_BUNDLE) -> bool:
+    """
+    Install-time step (`python prerender.py --plotly-bundle`): write the installed
+    plotly.js next to the component, so browsers load (and cache) it once.
+    Rewritten only when it differs; True if written. Renders never write it.
+    """
+    js = get_plotlyjs()
+    if path.is_file() and path.stat().st_size == len(js.encode("utf-8")) and path.read_text(encoding="utf-8") == js:
+        return False
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(js, encoding="utf-8")
+    tmp.replace(path)
+    return True
 
-def plot_scrollable(fig, *, cols=1, rows=1, cell_w=340, cell_h=260, extra_h=140):
+def plot_scrollable(fig, *, cols=1, rows=1, cell_w=340, cell_h=260, extra_h=140, key=None):
     """
     Render a Plotly figure inside a scrollable container.
     cols/rows: number of facet columns/rows to size the canvas.
+    Only the figure JSON travels per rerun; plotly.js is served once by the component
+    (see write_plotly_bundle), else loaded from the CDN in the installed version.
     """
     # Give each facet a reasonable cell size
     width  = max(1100, int(cols * cell_w) + 120)
     height = max(520,  int(rows * cell_h) + int(extra_h))
 
-    # Fix the figure size so Plotly doesn't auto-shrink
-    fig.update_layout(width=width, height=height)
-
-    # Embed the figure HTML inside a scrollable DIV
-    html = fig.to_html(include_plotlyjs="cdn", full_html=False)
-    components.html(
-        f"""
-        <div style="overflow:auto; width:100%; border:1px solid #eee; border-radius:8px;">
-          <div style="width:{width}px; height:{height}px;">{html}</div>
-        </div>
-        """,
-        height=min(height + 50, 1400),
-        scrolling=True,
+    # the size travels as component args (the component fixes it so Plotly doesn't
+    # auto-shrink): `fig` may be the object held by the figure cache, so it is not touched
+    with span("plot_scrollable") as s:
+        payload = fig.to_json()
+        s.count(bytes=len(payload))
+    _scrollable_plot(
+        figure=payload, width=width, height=height,
+        frame_height=min(height + 50, 1400), plotly_version=get_plotlyjs_version(),
+        key=key, default=None,
     )
 def _facet_grid_dims(sep_countries, sep_categories, eff_geos, eff_cats):
     """
@@ -103,24 +128,78 @@ def _country_slug(name: str) -> str:
         .replace("(", "").replace(")", "").replace("/", "_")
     )
 
+class FlagAssets:
+    """
+    Process-wide flag images: each folder is listed and its PNGs encoded as
+    data URIs once per size (downscaled to `px` when Pillow is available), so
+    charts and legends embed them without touching the disk. `clear()` picks up
+    flags added while the app runs and bumps `generation`, which caches of
+    HTML built from the URIs (the legend tables) key on.
+    """
+
+    def __init__(self):
+        self._folders: dict = {}
+        self._lock = threading.Lock()
+        self.generation = 0
+
+    def _load(self, folder: str, px: int) -> dict:
+        uris = {}
+        try:
+            entries = sorted(os.scandir(folder), key=lambda e: e.name)
+        except OSError:
+            return uris
+        for entry in entries:
+            stem, ext = os.path.splitext(entry.name)
+            if ext.lower() != ".png" or not entry.is_file():
+                continue
+            try:
+                uris[stem] = "data:image/png;base64," + base64.b64encode(self._png(entry.path, px)).decode("ascii")
+            except Exception:
+                continue  # unreadable image: no flag, as before
+        return uris
+
+    @staticmethod
+    def _png(path: str, px: int) -> bytes:
+        with open(path, "rb") as fh:
+            data = fh.read()
+        if Image is None:
+            return data
+        img = Image.open(io.BytesIO(data))
+        if max(img.size) <= px:
+            return data
+        img.thumbnail((px, px))
+        out = io.BytesIO()
+        img.save(out, format="PNG", optimize=True)
+        return out.getvalue()
+
+    def uri(self, name: str, folder="flags", px: int = 96) -> str | None:
+        """Data URI of `<folder>/<country slug>.png` at most `px` wide, or None if there is no such flag."""
+        key = (os.fspath(folder), px)
+        uris = self._folders.get(key)
+        if uris is None:
+            uris = self._load(*key)
+            with self._lock:
+                self._folders[key] = uris
+        return uris.get(_country_slug(name))
+
+    def clear(self):
+        with self._lock:
+            self._folders.clear()
+            self.generation += 1
+
+FLAGS = FlagAssets()
+
 def add_flag_strip(fig, country_names, folder="flags", y=-0.34, size=0.08, per_row=8):
     """Draw small flags under the legend. PNGs should be in ./flags/<country>.png ."""
     if not country_names:
         return fig
     fig.update_layout(margin=dict(b=max((fig.layout.margin.b or 80), 150)))
-    if Image is None:
-        return fig  # silently skip if Pillow isn't available
 
     x0, gap = 0.02, 0.11
     row = col = 0
     for name in sorted(set(country_names)):
-        slug = _country_slug(name)
-        path = os.path.join(folder, f"{slug}.png")
-        if not os.path.isfile(path):
-            continue
-        try:
-            img = Image.open(path)
-        except Exception:
+        uri = FLAGS.uri(name, folder)
+        if uri is None:
             continue
 
         xr = x0 + col * gap
@@ -130,7 +209,7 @@ def add_flag_strip(fig, country_names, folder="flags", y=-0.34, size=0.08, per_r
             col = 0
             row += 1
 
-        fig.add_layout_image(dict(source=img, xref="paper", yref="paper",
+        fig.add_layout_image(dict(source=uri, xref="paper", yref="paper",
                                   x=xr, y=yr + size, sizex=size, sizey=size,
                                   xanchor="left", yanchor="top", layer="above"))
         fig.add_annotation(
@@ -143,39 +222,42 @@ def add_flag_strip(fig, country_names, folder="flags", y=-0.34, size=0.08, per_r
 def _category_color_map(categories):
     return {cat: CATEGORY_COLOR_SEQ[i % len(CATEGORY_COLOR_SEQ)] for i, cat in enumerate(categories)}
 
+def country_category_matrix_html(countries, categories, color_mode="category", flags_folder="flags") -> str:
+    """The legend table as one HTML block: a column per country, a swatch row per category."""
+    cat_colors = _category_color_map(categories)
+    columns = []
+    for country in countries:
+        uri = FLAGS.uri(country, flags_folder, px=56)  # shown at 28px; 2x for high-DPI screens
+        head = f'<img src="{uri}" width="28" style="display:block;margin-bottom:4px;">' if uri else ""
+        rows = "".join(
+            '<div style="display:flex;align-items:center;margin:2px 0;">'
+            f'<span style="width:10px;height:10px;background:'
+            f'{cat_colors[cat] if color_mode == "category" else COUNTRY_FLAG_COLORS.get(country, "#666666")};'
+            'display:inline-block;border-radius:50%;margin-right:8px;flex:none;"></span>'
+            f'<span style="font-size:0.92rem;">{html.escape(str(cat))}</span></div>'
+            for cat in categories
+        )
+        columns.append(f'<div>{head}<p style="font-weight:600;margin:0 0 4px;">{html.escape(str(country))}</p>{rows}</div>')
+    return (f'<div style="display:grid;grid-template-columns:repeat({len(columns)},minmax(0,1fr));'
+            f'gap:1rem;">{"".join(columns)}</div>')
+
+_LEGENDS = LRUCache(maxsize=64)  # (countries, categories, mode, folder, FLAGS.generation) -> HTML
+
 def render_country_category_matrix(countries, categories, color_mode="category", flags_folder="flags"):
     """
     Under-chart "legend table":
       - one column per country (flag shown if found)
       - rows = categories, with color swatch matching the chart
+    Emitted as a single HTML element; flags come from the in-memory FLAGS cache.
     """
     if not countries or not categories:
         return
-    cols = st.columns(len(countries))
-    cat_colors = _category_color_map(categories)
-    for i, country in enumerate(countries):
-        with cols[i]:
-            path = os.path.join(flags_folder, f"{_country_slug(country)}.png")
-            if os.path.isfile(path):
-                st.image(path, width=28)
-            st.markdown(f"**{country}**")
-            for cat in categories:
-                color = cat_colors[cat] if color_mode == "category" else COUNTRY_FLAG_COLORS.get(country, "#666666")
-                st.markdown(
-                    f"""
-                    <div style="display:flex;align-items:center;margin:2px 0;">
-                      <span style="width:10px;height:10px;background:{color};
-                                   display:inline-block;border-radius:50%;
-                                   margin-right:8px;"></span>
-                      <span style="font-size:0.92rem;">{cat}</span>
-                    </div>
-                    """,
-                    unsafe_allow_html=True,
-                )
-
-def series_summary_table(df):
-    """Latest MoM/YoY per (Country, Category) with suggested flag path."""
-    latest = df.sort_values("date").groupby(["geo_name", "coicop_name"], as_index=False).tail(1).copy()
+    key = (tuple(countries), tuple(categories), color_mode, os.fspath(flags_folder), FLAGS.generation)
+    st.html(_LEGENDS.get_or_build(key, lambda: country_category_matrix_html(
+        countries, categories, color_mode, flags_folder)))
+
+def series_summary_table(latest):
+    """Latest MoM/YoY per (Country, Category) with suggested flag path (`latest`: HicpCube.latest)."""
     tbl = latest[["geo_name","coicop_name","Monthly inflation rate","Annual inflation rate","date"]].rename(columns={
         "geo_name":"Country/Regions","coicop_name":"Categories",
         "Monthly inflation rate":"Monthly rate (%)","Annual inflation rate":"Annual rate (%)",
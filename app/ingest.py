@@ -0,0 +1,278 @@
+# ingest.py — Eurostat JSON-stat ingestion (Python port of fnStats6 / fnListChunks)
+from __future__ import annotations
+import argparse
+import http.client
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+import numpy as np
+import pandas as pd
+
+BASE_URL = "https://ec.europa.eu/eurostat/api/dissemination/statistics/1.0/data/"
+DATASET = "prc_hicp_midx"
+UNIT = "I15"
+START_MONTH = "2015-09"  # pStartMonth
+
+# pGeos / pCoicops and the DimGeo / DimCOICOP display labels of the Power BI model
+GEO_NAMES = {
+    "EU27_2020": "EU", "DE": "Germany", "FR": "France", "IT": "Italy",
+    "ES": "Spain", "NL": "Netherlands", "PL": "Poland",
+}
+COICOP_NAMES = {
+    "CP00": "All-items HICP",
+    "CP01": "Food & non-alcoholic beverages",
+    "CP03": "Clothing & footwear",
+    "CP04": "Housing, water, electricity, gas & other fuels",
+    "CP05": "Furnishings & household equipment",
+    "CP07": "Transport",
+    "CP10": "Education",
+    "CP11": "Restaurants & hotels",
+}
+
+CSV_COLUMNS = ["[Year]","[Month]","[geo]","[GeoName]","[COICOP]","[COICOP_Name]","[Value]"]
+
+# FactHICP_Weights: annual item weights and country weights (see weights.py)
+ITEM_WEIGHTS = "prc_hicp_inw"
+COUNTRY_WEIGHTS = "prc_hicp_cow"
+COUNTRY_WEIGHTS_STATINFO = "COWEU27_2020"
+WEIGHT_COLUMNS = ["[Year]","[geo]","[COICOP]","[Weight]"]
+
+def list_chunks(items, size):
+    """Split a list into chunks of `size` (fnListChunks)."""
+    items = list(items)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+# ----- JSON-stat decoding -----
+def _category_codes(dim: dict) -> list:
+    cat = dim.get("category", {})
+    idx = cat.get("index")
+    if isinstance(idx, list):
+        return [str(c) for c in idx]
+    if isinstance(idx, dict):
+        return [str(c) for c, _ in sorted(idx.items(), key=lambda kv: kv[1])]
+    return [str(c) for c in cat.get("label", {})]
+
+def _category_labels(dim: dict) -> dict:
+    return {str(k): v for k, v in dim.get("category", {}).get("label", {}).items()}
+
+def decode_jsonstat(doc: dict) -> pd.DataFrame:
+    """
+    JSON-stat 2.0 dataset -> long frame with one column per dimension
+    (lower-cased, `time_period` renamed to `time`) plus `value`.
+    Only observations that carry a value are returned.
+    """
+    ds = doc.get("dataset", doc)
+    ids = [str(i).lower() for i in ds["id"]]
+    dims = {str(k).lower(): v for k, v in ds["dimension"].items()}
+    codes = [np.asarray(_category_codes(dims[i]), dtype=object) for i in ids]
+    sizes = [len(c) for c in codes]
+
+    raw = ds.get("value", [])
+    if isinstance(raw, dict):
+        pos = np.fromiter((int(k) for k in raw), dtype=np.int64, count=len(raw))
+        val = np.array(list(raw.values()), dtype=float)
+    else:
+        val = np.array(raw, dtype=float)
+        pos = np.arange(val.size, dtype=np.int64)
+    keep = ~np.isnan(val)
+    pos, val = pos[keep], val[keep]
+
+    # last dimension varies fastest (row-major), as in the M code
+    coords = np.unravel_index(pos, sizes) if sizes else ()
+    out = pd.DataFrame({i: codes[k][coords[k]] for k, i in enumerate(ids)})
+    out["value"] = val
+    out = out.rename(columns={"time_period": "time"})
+    out.attrs["labels"] = {i: _category_labels(dims[i]) for i in ids}
+    return out
+
+def to_csv_layout(obs: pd.DataFrame) -> pd.DataFrame:
+    """Decoded observations -> the `[Year],[Month],...` layout `load_data` reads."""
+    labels = obs.attrs.get("labels", {})
+    time = obs["time"].astype(str)
+    geo_names = {**labels.get("geo", {}), **GEO_NAMES}
+    coicop_names = {**labels.get("coicop", {}), **COICOP_NAMES}
+    out = pd.DataFrame({
+        "[Year]": time.str.slice(0, 4).astype(int),
+        "[Month]": time.str.slice(-2).astype(int),  # "2024-05" or "2024M05"
+        "[geo]": obs["geo"],
+        "[GeoName]": obs["geo"].map(geo_names).fillna(obs["geo"]),
+        "[COICOP]": obs["coicop"],
+        "[COICOP_Name]": obs["coicop"].map(coicop_names).fillna(obs["coicop"]),
+        "[Value]": obs["value"],
+    })
+    return out.sort_values(["[Year]","[Month]","[geo]","[COICOP]"]).reset_index(drop=True)
+
+# ----- HTTP -----
+class _Fetcher:
+    """GETs against one host, with a keep-alive connection per worker thread."""
+
+    def __init__(self, base_url: str, timeout: float = 90.0):
+        parts = urlsplit(base_url)
+        self.https = parts.scheme == "https"
+        self.netloc = parts.netloc
+        self.path = parts.path.rstrip("/") + "/"
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _conn(self, fresh=False):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or fresh:
+            if conn is not None:
+                conn.close()
+            cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+            conn = self._local.conn = cls(self.netloc, timeout=self.timeout)
+        return conn
+
+    def get_json(self, dataset: str, query: list) -> dict:
+        url = f"{self.path}{dataset}?{urlencode(query)}"
+        for attempt in (0, 1):
+            conn = self._conn(fresh=attempt > 0)
+            try:
+                conn.request("GET", url, headers={"Accept": "application/json"})
+                resp = conn.getresponse()
+                body = resp.read()
+            except (http.client.HTTPException, OSError):
+                if attempt:
+                    raise
+                continue  # stale keep-alive connection: reconnect once
+            if resp.status != 200:
+                raise RuntimeError(f"Eurostat API {resp.status} for {url}: {body[:200]!r}")
+            return json.loads(body)
+
+def _query(unit, geos, coicops, since, until):
+    q = [("lang", "EN"), ("freq", "M"), ("unit", unit), ("sinceTimePeriod", since)]
+    if until:
+        q.append(("untilTimePeriod", until))
+    q += [("coicop", c) for c in coicops] + [("geo", g) for g in geos]
+    return q
+
+def fetch(geos=tuple(GEO_NAMES), coicops=tuple(COICOP_NAMES), since=START_MONTH, until=None, *,
+          dataset=DATASET, unit=UNIT, base_url=BASE_URL,
+          geo_chunk=4, coicop_chunk=4, max_workers=4) -> pd.DataFrame:
+    """Fetch geo x coicop chunks concurrently and return them in the CSV layout."""
+    fetcher = _Fetcher(base_url)
+    jobs = [_query(unit, g, c, since, until)
+            for g in list_chunks(geos, geo_chunk) for c in list_chunks(coicops, coicop_chunk)]
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        docs = list(pool.map(lambda q: fetcher.get_json(dataset, q), jobs))
+    frames = [to_csv_layout(decode_jsonstat(d)) for d in docs]
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame(columns=CSV_COLUMNS)
+    return (pd.concat(frames, ignore_index=True)
+              .sort_values(["[Year]","[Month]","[geo]","[COICOP]"]).reset_index(drop=True))
+
+def fetch_weights(geos=tuple(GEO_NAMES), coicops=tuple(COICOP_NAMES), since=START_MONTH[:4],
+                  until=None, *, base_url=BASE_URL, geo_chunk=4, coicop_chunk=4,
+                  max_workers=4) -> pd.DataFrame:
+    """Annual item and country weights in the `[Year],[geo],[COICOP],[Weight]` layout."""
+    fetcher = _Fetcher(base_url)
+    base = [("lang", "EN"), ("freq", "A"), ("sinceTimePeriod", since)]
+    if until:
+        base.append(("untilTimePeriod", until))
+    jobs = [(ITEM_WEIGHTS, base + [("coicop", c) for c in cs] + [("geo", g) for g in gs])
+            for gs in list_chunks(geos, geo_chunk) for cs in list_chunks(coicops, coicop_chunk)]
+    jobs += [(COUNTRY_WEIGHTS, base + [("statinfo", COUNTRY_WEIGHTS_STATINFO)] + [("geo", g) for g in gs])
+             for gs in list_chunks(geos, geo_chunk)]
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        docs = list(pool.map(lambda job: fetcher.get_json(*job), jobs))
+    frames = []
+    for (dataset, _), doc in zip(jobs, docs):
+        obs = decode_jsonstat(doc)
+        frames.append(pd.DataFrame({
+            "[Year]": obs["time"].astype(str).str.slice(0, 4).astype(int),
+            "[geo]": obs["geo"],
+            "[COICOP]": obs["coicop"] if dataset == ITEM_WEIGHTS else "",
+            "[Weight]": obs["value"],
+        }))
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame(columns=WEIGHT_COLUMNS)
+    return (pd.concat(frames, ignore_index=True)
+              .sort_values(["[Year]","[geo]","[COICOP]"]).reset_index(drop=True))
+
+# ----- Incremental append -----
+_KEY = ["[Year]","[Month]","[geo]","[COICOP]"]
+
+def _stored_cells(path: Path) -> pd.DataFrame | None:
+    """(year, month, geo, coicop) of the cells with a value in an existing CSV, or None."""
+    if not Path(path).is_file():
+        return None
+    cur = pd.read_csv(path, usecols=[*_KEY, "[Value]"], encoding="utf-8")
+    for col in ("[Year]", "[Month]", "[Value]"):
+        cur[col] = pd.to_numeric(cur[col], errors="coerce")
+    cur = cur.dropna()
+    cur[["[Year]", "[Month]"]] = cur[["[Year]", "[Month]"]].astype("int64")
+    return cur[_KEY] if not cur.empty else None
+
+def _period(ym: int) -> pd.Period:
+    return pd.Period(year=int(ym // 12), month=int(ym % 12) + 1, freq="M")
+
+def latest_stored_month(path: Path) -> pd.Period | None:
+    """Newest month with a value in an existing CSV, or None."""
+    cells = _stored_cells(path)
+    return None if cells is None else _period((cells["[Year]"] * 12 + cells["[Month]"] - 1).max())
+
+def latest_stored_months(path: Path, cells: pd.DataFrame | None = None) -> dict:
+    """(geo, coicop) -> newest month with a value, per series of an existing CSV."""
+    cells = _stored_cells(path) if cells is None else cells
+    if cells is None:
+        return {}
+    ym = (cells["[Year]"] * 12 + cells["[Month]"] - 1).groupby([cells["[geo]"], cells["[COICOP]"]]).max()
+    return {key: _period(v) for key, v in ym.items()}
+
+def update_csv(path: Path, start=START_MONTH, geos=tuple(GEO_NAMES), coicops=tuple(COICOP_NAMES),
+               **fetch_kwargs) -> int:
+    """
+    Append the months each series is missing after its own latest stored one
+    (series not stored yet: from `start`); returns rows appended. One fetch
+    from the oldest resume month, so series that lag the newest month catch
+    up; cells already in the file are dropped before appending.
+    """
+    path = Path(path)
+    stored = _stored_cells(path)
+    last = latest_stored_months(path, stored)
+    since = min(last[(g, c)] + 1 if (g, c) in last else pd.Period(start, freq="M")
+                for g in geos for c in coicops)
+    new = fetch(geos, coicops, since=str(since), **fetch_kwargs)
+    if stored is not None and not new.empty:
+        seen = pd.MultiIndex.from_frame(new[_KEY]).isin(pd.MultiIndex.from_frame(stored))
+        new = new[~seen].reset_index(drop=True)
+    if new.empty:
+        return 0
+    exists = path.is_file() and path.stat().st_size > 0
+    if exists:
+        with open(path, "rb") as fh:
+            fh.seek(-1, 2)
+            if fh.read(1) != b"\n":
+                with open(path, "ab") as out:
+                    out.write(b"\r\n")
+    new.to_csv(path, mode="a", header=not exists, index=False,
+               encoding="utf-8", lineterminator="\r\n")
+    return len(new)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Append new Eurostat HICP months to the app CSV.")
+    ap.add_argument("--csv", default=str(Path("data") / "data hicp.csv"))
+    ap.add_argument("--base-url", default=BASE_URL, help="e.g. a local jsonstat_stub.py server")
+    ap.add_argument("--until", default=None, help="last month to request, YYYY-MM")
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--geo-chunk", type=int, default=4)
+    ap.add_argument("--coicop-chunk", type=int, default=4)
+    ap.add_argument("--weights", metavar="CSV", help="(re)write the weights file instead of appending months")
+    a = ap.parse_args(argv)
+    if a.weights:
+        w = fetch_weights(base_url=a.base_url, until=a.until and a.until[:4], max_workers=a.workers,
+                          geo_chunk=a.geo_chunk, coicop_chunk=a.coicop_chunk)
+        w.to_csv(a.weights, index=False, encoding="utf-8", lineterminator="\r\n")
+        print(f"wrote {len(w)} weight rows to {a.weights}")
+        return
+    n = update_csv(Path(a.csv), base_url=a.base_url, until=a.until, max_workers=a.workers,
+                   geo_chunk=a.geo_chunk, coicop_chunk=a.coicop_chunk)
+    print(f"appended {n} rows to {a.csv}")
+
+if __name__ == "__main__":
+    main()
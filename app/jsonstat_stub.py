@@ -0,0 +1,142 @@
+# jsonstat_stub.py — offline stand-in for the Eurostat Statistics API
+"""
+Serves recorded JSON-stat 2.0 responses from a folder so `ingest.py` can be
+tested and benchmarked without network access:
+
+    python jsonstat_stub.py fixtures --port 8765
+    python ingest.py --base-url http://127.0.0.1:8765/
+
+`fixtures/<dataset>.json` holds one full recorded response; each request is
+answered with the geo / coicop / sinceTimePeriod / untilTimePeriod slice of it.
+`--from-csv` writes such a fixture from an existing app CSV instead.
+"""
+from __future__ import annotations
+import argparse
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from ingest import DATASET, UNIT, _category_codes
+
+def csv_to_jsonstat(path: Path, unit: str = UNIT) -> dict:
+    """Encode an app CSV as a dense JSON-stat 2.0 dataset (freq, unit, coicop, geo, time)."""
+    raw = pd.read_csv(path, encoding="utf-8").dropna(subset=["[Value]"])
+    time = (raw["[Year]"].astype(int).astype(str) + "-"
+            + raw["[Month]"].astype(int).astype(str).str.zfill(2))
+    axes = {
+        "freq": ["M"], "unit": [unit],
+        "coicop": sorted(raw["[COICOP]"].unique()),
+        "geo": sorted(raw["[geo]"].unique()),
+        "time": sorted(time.unique()),
+    }
+    labels = {
+        "coicop": dict(zip(raw["[COICOP]"], raw["[COICOP_Name]"])),
+        "geo": dict(zip(raw["[geo]"], raw["[GeoName]"])),
+    }
+    sizes = [len(v) for v in axes.values()]
+    dense = np.full(sizes, np.nan)
+    c = pd.Index(axes["coicop"]).get_indexer(raw["[COICOP]"])
+    g = pd.Index(axes["geo"]).get_indexer(raw["[geo]"])
+    t = pd.Index(axes["time"]).get_indexer(time)
+    dense[0, 0, c, g, t] = raw["[Value]"].to_numpy(float)
+    return _dataset(axes, labels, dense)
+
+def _dataset(axes: dict, labels: dict, dense: np.ndarray) -> dict:
+    flat = dense.ravel()
+    pos = np.flatnonzero(~np.isnan(flat))
+    return {
+        "version": "2.0", "class": "dataset", "label": "HICP (stub)",
+        "id": list(axes), "size": list(dense.shape),
+        "dimension": {
+            k: {"category": {"index": {code: i for i, code in enumerate(v)},
+                             "label": {code: labels.get(k, {}).get(code, code) for code in v}}}
+            for k, v in axes.items()
+        },
+        "value": {str(int(p)): float(flat[p]) for p in pos},
+    }
+
+def slice_dataset(doc: dict, query: dict) -> dict:
+    """Answer an API query from a recorded full response."""
+    ids = list(doc["id"])
+    axes = {i: _category_codes(doc["dimension"][i]) for i in ids}
+    labels = {i: doc["dimension"][i]["category"].get("label", {}) for i in ids}
+    dense = np.full(doc["size"], np.nan)
+    if doc["value"]:
+        flat = dense.reshape(-1)
+        raw = doc["value"]
+        if isinstance(raw, dict):
+            flat[np.fromiter(map(int, raw), dtype=np.int64)] = list(raw.values())
+        else:
+            flat[:] = np.array(raw, dtype=float)
+
+    keep = {}
+    for i in ids:
+        codes = axes[i]
+        wanted = query.get(i.lower())
+        if i.lower() in ("time", "time_period"):
+            lo = query.get("sinceTimePeriod", [""])[0]
+            hi = query.get("untilTimePeriod", ["9999"])[0]
+            keep[i] = [k for k, code in enumerate(codes) if lo <= code <= hi]
+        elif wanted:
+            keep[i] = [k for k, code in enumerate(codes) if code in wanted]
+        else:
+            keep[i] = list(range(len(codes)))
+    sub = dense[np.ix_(*keep.values())]
+    sub_axes = {i: [axes[i][k] for k in keep[i]] for i in ids}
+    return _dataset(sub_axes, labels, sub)
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+    fixtures: Path = Path("fixtures")
+    _docs: dict = {}
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        dataset = parts.path.rstrip("/").rsplit("/", 1)[-1]
+        doc = self._docs.get(dataset)
+        if doc is None:
+            f = self.fixtures / f"{dataset}.json"
+            if not f.is_file():
+                return self._send(404, {"error": f"no fixture for {dataset}"})
+            doc = self._docs[dataset] = json.loads(f.read_text(encoding="utf-8"))
+        self._send(200, slice_dataset(doc, parse_qs(parts.query)))
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def serve(fixtures: Path, host="127.0.0.1", port=8765) -> ThreadingHTTPServer:
+    """Return a bound server; call `serve_forever()` (or run it in a thread)."""
+    handler = type("Handler", (_Handler,), {"fixtures": Path(fixtures), "_docs": {}})
+    return ThreadingHTTPServer((host, port), handler)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Serve recorded JSON-stat fixtures.")
+    ap.add_argument("fixtures", help="folder with <dataset>.json files")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--from-csv", help="write fixtures/<dataset>.json from an app CSV and exit")
+    ap.add_argument("--dataset", default=DATASET)
+    a = ap.parse_args(argv)
+    if a.from_csv:
+        out = Path(a.fixtures) / f"{a.dataset}.json"
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(csv_to_jsonstat(Path(a.from_csv))), encoding="utf-8")
+        print(f"wrote {out}")
+        return
+    server = serve(Path(a.fixtures), port=a.port)
+    print(f"serving {a.fixtures} on http://127.0.0.1:{a.port}/")
+    server.serve_forever()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+# loader.py — CSV parsing, rate derivation & on-disk cube snapshot cache
+from __future__ import annotations
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from cube import HicpCube
+
+import pyarrow as pa  # the Arrow IPC snapshot and the typed CSV parse
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+
+# Bump whenever the snapshot layout or the rate derivation changes;
+# snapshots written by an older version are rebuilt automatically.
+SNAPSHOT_VERSION = 4
+SNAPSHOT_DIR = ".snapshots"
+_FINGERPRINT_KEY = b"hicp_fingerprint"
+_AXES_KEY = b"hicp_axes"
+
+COLUMN_MAP = {
+    "[Year]":"year","[Month]":"month","[geo]":"geo","[GeoName]":"geo_name",
+    "[COICOP]":"coicop","[COICOP_Name]":"coicop_name","[Value]":"index",
+}
+
+def read_csv(path: Path, engine: str = "auto") -> pd.DataFrame:
+    """
+    Parse the HICP CSV into typed observations with a month-start `date`.
+    engine "auto" uses the typed pyarrow parse and falls back to pandas (which
+    coerces malformed numbers to NaN) if the file does not fit the schema;
+    "pyarrow" / "pandas" force one parse.
+    """
+    if engine in ("auto", "pyarrow"):
+        try:
+            return read_csv_arrow(path)
+        except (pa.ArrowInvalid, KeyError):
+            if engine == "pyarrow":
+                raise
+    df = pd.read_csv(path, low_memory=False, encoding="utf-8", on_bad_lines="skip")
+    return clean_observations(df)
+
+def _arrow_column_types() -> dict:
+    text = pa.dictionary(pa.int32(), pa.string())  # -> pandas categorical, no per-row str objects
+    return {"[Year]": pa.int16(), "[Month]": pa.int8(), "[geo]": text, "[GeoName]": text,
+            "[COICOP]": text, "[COICOP_Name]": text, "[Value]": pa.float64()}
+
+def read_csv_arrow(path: Path) -> pd.DataFrame:
+    """Multithreaded parse against the declared schema; dates computed from year/month."""
+    table = pa_csv.read_csv(
+        path,
+        read_options=pa_csv.ReadOptions(use_threads=True),
+        parse_options=pa_csv.ParseOptions(invalid_row_handler=lambda row: "skip"),
+        convert_options=pa_csv.ConvertOptions(column_types=_arrow_column_types(),
+                                              include_columns=list(COLUMN_MAP)),
+    )
+    table = table.rename_columns([COLUMN_MAP[c] for c in table.column_names])
+    ok = pc.and_(pc.and_(pc.is_valid(table["year"]), pc.is_valid(table["index"])),
+                 pc.and_(pc.greater_equal(table["month"], 1), pc.less_equal(table["month"], 12)))
+    df = table.filter(pc.fill_null(ok, False)).to_pandas()
+    ym = (df["year"].to_numpy("int64") - 1970) * 12 + df["month"].to_numpy("int64") - 1
+    df["date"] = ym.astype("datetime64[M]").astype("datetime64[ns]")
+    return df
+
+def clean_observations(df: pd.DataFrame) -> pd.DataFrame:
+    """Rename raw CSV columns, coerce types and drop unusable rows (also per chunk)."""
+    df = df.rename(columns=COLUMN_MAP)
+    required = set(COLUMN_MAP.values())
+    missing = required.difference(df.columns)
+    if missing:
+        raise ValueError(f"CSV missing required columns: {sorted(missing)}")
+
+    df["year"]  = pd.to_numeric(df["year"], errors="coerce").astype("Int64")
+    df["month"] = pd.to_numeric(df["month"], errors="coerce").astype("Int64")
+    df["index"] = pd.to_numeric(df["index"], errors="coerce")
+    df = df.dropna(subset=["year","month","index"]).copy()
+
+    df["date"] = pd.to_datetime(dict(year=df["year"].astype(int),
+                                     month=df["month"].astype(int), day=1))
+    return df
+
+def build_frame(path: Path) -> pd.DataFrame:
+    """
+    Parse the CSV and derive calendar-aware `mom_%` / `yoy_%` through the cube.
+    Duplicate cells of the source are kept in `attrs`.
+    """
+    return _frame(HicpCube.from_frame(read_csv(path)))
+
+def _frame(cube: HicpCube) -> pd.DataFrame:
+    df = cube.to_frame()
+    df.attrs["duplicates"] = [list(d) for d in cube.duplicates]
+    return df
+
+# ----- Snapshot cache -----
+def source_fingerprint(path: Path) -> dict:
+    """Identity of a source file: size, mtime, content hash and derivation version."""
+    info = os.stat(path)
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            h.update(block)
+    return dict(size=info.st_size, mtime_ns=info.st_mtime_ns,
+                hash=h.hexdigest(), version=SNAPSHOT_VERSION)
+
+def snapshot_path(path: Path) -> Path:
+    path = Path(path)
+    return path.parent / SNAPSHOT_DIR / f"{path.stem}.arrow"
+
+def previous_snapshot_path(path: Path) -> Path:
+    """Where the snapshot of the previous source version is kept (for revision checks)."""
+    snap = snapshot_path(path)
+    return snap.with_name(f"{snap.stem}.prev.arrow")
+
+def cube_table(cube: HicpCube, fingerprint: dict) -> "pa.Table":
+    """
+    The cube's arrays as flat columns (index, mom, yoy, last_obs in C order), with
+    its axes, duplicate cells and the source fingerprint in the schema metadata.
+    """
+    axes = dict(geos=cube.geos.tolist(), geo_names=cube.geo_names.tolist(),
+                coicops=cube.coicops.tolist(), coicop_names=cube.coicop_names.tolist(),
+                start=cube.month_labels[0] if len(cube.months) else None, months=len(cube.months),
+                duplicates=[list(d) for d in cube.duplicates])
+    table = pa.table({name: np.ascontiguousarray(getattr(cube, name)).ravel()
+                      for name in ("index", "mom", "yoy", "last_obs")})
+    return table.replace_schema_metadata({_FINGERPRINT_KEY: json.dumps(fingerprint).encode("utf-8"),
+                                          _AXES_KEY: json.dumps(axes).encode("utf-8")})
+
+def cube_from_table(table: "pa.Table", version: str = "") -> HicpCube:
+    """Inverse of cube_table: the arrays are taken as stored, nothing is derived again."""
+    axes = json.loads(table.schema.metadata[_AXES_KEY])
+    shape = (len(axes["geos"]), len(axes["coicops"]), axes["months"])
+    months = (pd.date_range(axes["start"], periods=shape[2], freq="MS") if shape[2]
+              else pd.DatetimeIndex([], dtype="datetime64[ns]"))
+    arrays = {name: _column_array(table[name]).reshape(shape) for name in ("index", "mom", "yoy", "last_obs")}
+    return HicpCube(np.array(axes["geos"], dtype=object), np.array(axes["geo_names"], dtype=object),
+                    np.array(axes["coicops"], dtype=object), np.array(axes["coicop_names"], dtype=object),
+                    months, arrays["index"], arrays["mom"], arrays["yoy"], version, arrays["last_obs"],
+                    tuple(map(tuple, axes["duplicates"])))
+
+def _column_array(column: "pa.ChunkedArray") -> np.ndarray:
+    """A column as a read-only view of its Arrow buffer (one chunk, no nulls), else a copy."""
+    if column.num_chunks == 1 and column.null_count == 0:
+        return column.chunk(0).to_numpy(zero_copy_only=True)
+    return column.to_numpy()
+
+def read_snapshot(snap: Path, fingerprint: dict | None = None) -> HicpCube | None:
+    """
+    The snapshot's cube; None if it is missing, unreadable or (given `fingerprint`)
+    stale. The file is memory-mapped and the cube's arrays are views of the
+    mapping, so processes reading the same snapshot share its pages.
+    """
+    if not snap.is_file():
+        return None
+    try:
+        with pa.memory_map(str(snap), "r") as source:
+            reader = pa.ipc.open_file(source)
+            stored = json.loads((reader.schema.metadata or {}).get(_FINGERPRINT_KEY, b"null"))
+            if stored is None or (fingerprint is not None and stored != fingerprint):
+                return None
+            return cube_from_table(reader.read_all(), data_version(stored))
+    except Exception:
+        return None  # corrupt, truncated or an older layout -> rebuild
+
+def write_snapshot(cube: HicpCube, snap: Path, fingerprint: dict, previous: Path | None = None) -> None:
+    """Write the cube as Arrow IPC next to the source; replaced atomically (the old one moves to `previous`)."""
+    table = cube_table(cube, fingerprint)
+    tmp = snap.with_name(f"{snap.name}.{os.getpid()}.tmp")
+    try:
+        snap.parent.mkdir(parents=True, exist_ok=True)
+        with pa.OSFile(str(tmp), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        if previous is not None and snap.is_file():
+            os.replace(snap, previous)
+        os.replace(tmp, snap)
+    except OSError:
+        tmp.unlink(missing_ok=True)  # read-only deploy: keep serving without a snapshot
+
+def data_version(fingerprint: dict) -> str:
+    """Short, stable identifier of a source file + derivation version."""
+    return f"{fingerprint['hash'][:12]}-v{fingerprint['version']}"
+
+def load_cube(path: Path) -> HicpCube:
+    """
+    The geo × COICOP × month cube, read back from the snapshot when it matches
+    the source (no pivot or rate derivation), else built from the CSV and snapshotted.
+    """
+    fingerprint = source_fingerprint(path)
+    snap = snapshot_path(path)
+    cube = read_snapshot(snap, fingerprint)
+    if cube is None:
+        cube = HicpCube.from_frame(read_csv(path), version=data_version(fingerprint))
+        write_snapshot(cube, snap, fingerprint, previous_snapshot_path(path))
+    return cube
+
+def load_frame(path: Path) -> pd.DataFrame:
+    """Derived HICP long frame, from the cube snapshot when it matches the source."""
+    return _frame(load_cube(path))
+
+def load_previous_cube(path: Path) -> HicpCube | None:
+    """Cube of the source version before the current one, if its snapshot was kept."""
+    return read_snapshot(previous_snapshot_path(path))
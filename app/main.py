@@ -1,118 +1,165 @@
 # main.py — entry point
 from __future__ import annotations
 import streamlit as st
-import pandas as pd
-import numpy as np
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+import os
+import time
 from pathlib import Path
 
+from cube import HicpCube
+from export import TABLES, available_formats, export_file, file_name, filtered_table, mime
+from figcache import FIGURES
 from helpers import setup_theme, series_summary_table
-from filters import build_sidebar, apply_filters
+from filters import ALLOWED, build_sidebar, select
+from memory import render_memory_panel
+from query import kpis, live_dataset, selection_key, weighted_aggregates, weights_at
+from refresh import LiveDataset
+from store import ParquetStore
+import timing
+from timing import span
 from tabs import (
     render_tab_annual, render_tab_monthly, render_tab_index,
-    render_tab_latest_by_country, render_tab_by_category_latest
+    render_tab_latest_by_country, render_tab_by_category_latest, render_tab_contributions,
+    render_tab_derived, render_tab_quality, RATE_LABELS,
 )
 
 st.set_page_config(page_title="EU HICP Dashboard", layout="wide")
 setup_theme()
 
-DATA_PATH = Path("data") / "data hicp.csv"
-
-@st.cache_data
-def load_data(path: Path) -> pd.DataFrame:
-    df = pd.read_csv(path, low_memory=False, encoding="utf-8", on_bad_lines="skip")
-    df = df.rename(columns={
-        "[Year]":"year","[Month]":"month","[geo]":"geo","[GeoName]":"geo_name",
-        "[COICOP]":"coicop","[COICOP_Name]":"coicop_name","[Value]":"index",
-    })
-    required = {"year","month","geo","geo_name","coicop","coicop_name","index"}
-    missing = required.difference(df.columns)
-    if missing:
-        raise ValueError(f"CSV missing required columns: {sorted(missing)}")
-
-    df["year"]  = pd.to_numeric(df["year"], errors="coerce").astype("Int64")
-    df["month"] = pd.to_numeric(df["month"], errors="coerce").astype("Int64")
-    df["index"] = pd.to_numeric(df["index"], errors="coerce")
-    df = df.dropna(subset=["year","month","index"]).copy()
-
-    df["date"] = pd.to_datetime(dict(year=df["year"].astype(int),
-                                     month=df["month"].astype(int), day=1))
-    df = df.sort_values(["geo","coicop","date"]).reset_index(drop=True)
-    g = df.groupby(["geo","coicop"], sort=False, dropna=False)
-    prev1, prev12 = g["index"].shift(1), g["index"].shift(12)
-    df["mom_%"] = (df["index"]/prev1 - 1.0) * 100.0
-    df["yoy_%"] = (df["index"]/prev12 - 1.0) * 100.0
-    df.loc[df["mom_%"].abs() > 500, "mom_%"] = np.nan
-    df.loc[df["yoy_%"].abs() > 500, "yoy_%"] = np.nan
-
-    for c in ["geo","geo_name","coicop","coicop_name"]:
-        df[c] = df[c].astype("category")
-    return df
-
-df = load_data(DATA_PATH)
+# a CSV file (loaded into memory) or a Parquet store directory (see store.py)
+DATA_PATH = Path(os.environ.get("HICP_DATA", Path("data") / "data hicp.csv"))
+
+@st.cache_resource
+def load_data(path: Path) -> LiveDataset:
+    """
+    One read-only dataset per process, referenced (not copied) by every session
+    and by the HTTP API when it runs in this process (query.py); a background
+    thread swaps in new versions when the source changes (refresh.py).
+    """
+    return live_dataset(path)
+
+# optional annual item/country weights (`python ingest.py --weights ...`, see weights.py)
+WEIGHTS_PATH = Path(os.environ.get("HICP_WEIGHTS", Path("data") / "hicp weights.csv"))
+
+# ---- Timing (opt-in: HICP_TIMING=1 or ?debug=1) ----
+_ctx = get_script_run_ctx()
+timing.begin(
+    _ctx.session_id if _ctx else "bare",
+    enabled=timing.enabled_by_env() or st.query_params.get("debug") == "1",
+    profile=st.session_state.pop("hicp_profile_next", False),  # one-shot, set by the timing panel
+)
+
+with span("load_data"):
+    state = load_data(DATA_PATH).state  # pinned for this rerun: dataset, load time, quality, error
+    cube: HicpCube | ParquetStore = state.dataset
+    weights = weights_at(WEIGHTS_PATH)  # re-read when the file changes
 
 # ---- Page header ----
 st.title("EU HICP Dashboard")
 st.caption("Index 2015=100. Rates computed from index per (Country/Regions, Categories).")
+st.caption(f"Data version `{cube.version}` · loaded {time.strftime('%Y-%m-%d %H:%M', time.localtime(state.loaded_at))}"
+           + (f" · last refresh failed: {state.error}" if state.error else ""))
 
 # ---- Filters ----
-params = build_sidebar(df)
-f = apply_filters(df, params)
-if f.empty:
-    st.warning("No data for the selected filters.")
-    st.stop()
-
-
-f["Monthly inflation rate"] = f["mom_%"]
-f["Annual inflation rate"]  = f["yoy_%"]
+with span("build_sidebar"):
+    params = build_sidebar(cube, allowed=None if isinstance(cube, ParquetStore) else ALLOWED)
+with span("apply_filters"):
+    sel = select(cube, params)
+    if sel.empty:
+        st.warning("No data for the selected filters.")
+        timing.render_timing_panel(timing.finish())
+        st.stop()
+with span("latest_by_series") as s:
+    latest_by_series = sel.latest(rate_labels=RATE_LABELS)
+    s.count(rows=len(latest_by_series))
+
+def long_frame():
+    """The selection as a long frame; only the line and derived views need it."""
+    with span("to_frame") as s:
+        frame = sel.to_frame(rate_labels=RATE_LABELS)
+        s.count(rows=len(frame))
+    return frame
+
+# cache key of everything derived from the selection
+sel_key = selection_key(cube, params)
+with span("weighted_aggregates"):
+    agg = weighted_aggregates(sel, weights, sel_key)
 
 # ---- KPIs ----
-latest_date = f["date"].max()
-latest = f[f["date"] == latest_date]
-kpi_annual  = latest["Annual inflation rate"].mean()
-kpi_monthly = latest["Monthly inflation rate"].mean()
-
+kpi = kpis(sel, agg)
+kpi_label = "Weighted" if kpi["weighted"] else "Avg"
 k1, k2, k3 = st.columns(3)
-k1.metric("Latest month", latest_date.strftime("%Y-%m"))
-k2.metric("Avg Annual inflation rate (selection)", f"{kpi_annual:,.2f}%")
-k3.metric("Avg Monthly inflation rate (selection)", f"{kpi_monthly:,.2f}%")
-
-# ---- Tabs ----
-tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
+k1.metric("Latest month", kpi["month"].strftime("%Y-%m"))
+k2.metric(f"{kpi_label} Annual inflation rate (selection)", f"{kpi['annual']:,.2f}%")
+k3.metric(f"{kpi_label} Monthly inflation rate (selection)", f"{kpi['monthly']:,.2f}%")
+if agg is not None and agg.unweighted:
+    st.caption(f"No weights for {', '.join(agg.unweighted)}: left out of the weighted figures.")
+
+# ---- Views (only the selected one is computed) ----
+VIEWS = [
     "Annual inflation rate by Date and Country",
     "Monthly inflation rate by Date and Country",
     "Index by Date and Country",
+    "Derived metrics",
     "Latest annual rate by Country",
     "By Category (annual rate)",
-    "Series table"
-])
-
-with tab1:
-    render_tab_annual(f, params["eff_geos"], params["eff_cats"],
-                      params["separate_countries"], params["separate_categories"])
-
-with tab2:
-    render_tab_monthly(f, params["eff_geos"], params["eff_cats"],
-                       params["separate_countries"], params["separate_categories"])
-
-with tab3:
-    render_tab_index(f, params["eff_geos"], params["eff_cats"],
-                     params["separate_countries"], params["separate_categories"])
-
-with tab4:
-    render_tab_latest_by_country(f)
-
-with tab5:
-    render_tab_by_category_latest(f)
-
-# ---- Raw filtered table + download ----
+    "Series table",
+]
+if agg is not None:
+    VIEWS.insert(-1, "Contributions to annual rate")
+VIEWS.insert(-1, "Data quality")
+view = st.radio("View", VIEWS, horizontal=True, key="view", label_visibility="collapsed")
+
+# figure-cache key of the line views: everything they depend on besides the metric
+# (the bar views ignore the facet checkboxes and use sel_key)
+fig_key = (*sel_key, params["separate_countries"], params["separate_categories"])
+line_args = (params["eff_geos"], params["eff_cats"],
+             params["separate_countries"], params["separate_categories"])
+f = None  # long frame, if the view builds one (for the memory readout)
+
+with span("render_view", view=view):
+    if view == VIEWS[0]:
+        f = long_frame()
+        render_tab_annual(f, *line_args, cache_key=fig_key)
+
+    elif view == VIEWS[1]:
+        f = long_frame()
+        render_tab_monthly(f, *line_args, cache_key=fig_key)
+
+    elif view == VIEWS[2]:
+        f = long_frame()
+        render_tab_index(f, *line_args, cache_key=fig_key)
+
+    elif view == VIEWS[3]:
+        f = long_frame()
+        render_tab_derived(cube, sel, f, params, cache_key=fig_key)
+
+    elif view == VIEWS[4]:
+        render_tab_latest_by_country(latest_by_series, cache_key=sel_key)
+
+    elif view == VIEWS[5]:
+        render_tab_by_category_latest(latest_by_series, cache_key=sel_key)
+
+    elif view == "Contributions to annual rate":
+        render_tab_contributions(agg, cache_key=(weights.version, *sel_key))
+
+    elif view == "Data quality":
+        render_tab_quality(state.quality)
+
+    else:
+        st.subheader("Latest per series")
+        st.dataframe(series_summary_table(latest_by_series), use_container_width=True, hide_index=True)
+
+# ---- Raw filtered table + download (under every view) ----
 st.subheader("Data (filtered)")
-table = (
-    f[["date","geo_name","coicop_name","index","Monthly inflation rate","Annual inflation rate"]]
-      .rename(columns={"date":"Date","geo_name":"Country/Regions",
-                       "coicop_name":"Categories","index":"Index (2015=100)"})
-      .sort_values(["Date","Country/Regions","Categories"])
-)
+with span("filtered_table") as s:
+    table = TABLES.get_or_build(sel_key, lambda: filtered_table(sel))  # from the cube, no long frame
+    s.count(rows=len(table))
 st.dataframe(table, use_container_width=True, hide_index=True)
-st.download_button("Download filtered CSV",
-                   data=table.to_csv(index=False).encode("utf-8"),
-                   file_name="hicp_filtered.csv", mime="text/csv")
+# built only on click, from the cube selection in month blocks
+fmt = st.selectbox("Export format", available_formats(), key="export_format")
+st.download_button(f"Download filtered {fmt}", data=lambda: export_file(sel, fmt),
+                   file_name=file_name(fmt), mime=mime(fmt), on_click="ignore")
+
+render_memory_panel(cube, sel, f, FIGURES)
+timing.render_timing_panel(timing.finish())
@@ -0,0 +1,55 @@
+# memory.py — resident-bytes accounting for the shared dataset and each session
+from __future__ import annotations
+import os
+import sys
+
+import numpy as np
+import streamlit as st
+
+def cube_bytes(cube, shared=None) -> int:
+    """Bytes held by `cube`'s arrays; with `shared`, only those not viewing into it."""
+    total = 0
+    base = list(shared.arrays().values()) if shared is not None else []
+    for a in cube.arrays().values():
+        if any(np.may_share_memory(a, b) for b in base):
+            continue
+        total += a.nbytes
+        if a.dtype == object:
+            total += sum(sys.getsizeof(v) for v in a.ravel())  # the str objects themselves
+    return total
+
+def frame_bytes(df) -> int:
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+def process_rss() -> int | None:
+    """Current resident set size of this process (Linux), else peak RSS, else None."""
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == "Darwin" else peak * 1024
+    except Exception:
+        return None
+
+def fmt_bytes(n) -> str:
+    if n is None:
+        return "n/a"
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(n) < 1024 or unit == "GB":
+            return f"{n:,.0f} {unit}" if unit == "B" else f"{n:,.1f} {unit}"
+        n /= 1024
+
+def render_memory_panel(cube, sel, f=None, figures=None):
+    """Sidebar readout: shared dataset vs. what this session holds on top of it (`f`: long frame, if built)."""
+    dataset = cube_bytes(cube)
+    session = cube_bytes(sel, shared=cube) + (frame_bytes(f) if f is not None else 0)
+    with st.sidebar.expander("Memory", expanded=False):
+        st.caption(f"Dataset (shared, read-only): **{fmt_bytes(dataset)}**")
+        st.caption(f"This session (selection{' + frame' if f is not None else ''}): **{fmt_bytes(session)}**")
+        if figures is not None:
+            st.caption(f"Figure cache ({len(figures)} figures, shared): **{fmt_bytes(figures.nbytes())}**")
+        st.caption(f"Process RSS: **{fmt_bytes(process_rss())}**")
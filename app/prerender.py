@@ -0,0 +1,167 @@
+# prerender.py — build the standard views' figures in a process pool
+"""
+Writes snapshots (see snapshots.py) of the views most sessions ask for, so the
+app serves them without a Plotly build and the output can be published as a
+static site:
+
+    python prerender.py                                # HICP_DATA -> HICP_VIEWS_DIR
+    python prerender.py data/hicp_store --workers 8
+    python prerender.py --views views.json --inline-js
+    python prerender.py --plotly-bundle                # only the app's plotly.js (install step)
+
+The standard set is EU all-items, each offered country's all-items, and each
+country by the top-level COICOP divisions, over the full month range with no
+facets (the sidebar defaults), in every line view and both latest-month bar
+views. `--views` replaces it with a JSON list of ViewSpec fields, e.g.
+
+    [{"geos": ["France", "Spain"], "cats": ["Transport"], "separate_countries": true}]
+
+Run it after each data update; snapshots of older data versions are pruned
+except the previous one. Every run also (re)writes the plotly.js bundle the
+app's chart component serves (helpers.write_plotly_bundle), so it always
+matches the installed plotly; `--plotly-bundle` does only that, at install time.
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import re
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, fields
+from pathlib import Path
+
+from plotly.offline import get_plotlyjs, get_plotlyjs_version
+
+from filters import ALLOWED, month_bounds
+from helpers import PLOTLY_BUNDLE, write_plotly_bundle
+from query import selection_key
+from snapshots import PLOTLY_JS, VIEWS_DIR, read_manifest, version_dir, write_manifest, write_snapshot
+from store import ParquetStore, open_dataset
+from tabs import (LINE_TITLES, RATE_LABELS, by_category_latest_figure,
+                  latest_by_country_figure, line_figure)
+
+CHARTS = (*LINE_TITLES, "latest_by_country", "by_category_latest")  # figure-cache names
+TOP_LEVEL = re.compile(r"CP(0[1-9]|1[0-2])")  # COICOP divisions
+
+@dataclass(frozen=True)
+class ViewSpec:
+    geos: tuple
+    cats: tuple
+    separate_countries: bool = False
+    separate_categories: bool = False
+    start: str | None = None  # "YYYY-MM"; None = first month (the sidebar default)
+    end: str | None = None    # None = last month
+    charts: tuple = CHARTS
+
+def standard_views(dataset, allowed=ALLOWED) -> list:
+    geos = [g for g in dataset.geo_options if allowed is None or g in allowed]
+    top = {n for c, n in zip(dataset.coicops, dataset.coicop_names) if TOP_LEVEL.fullmatch(str(c))}
+    divisions = tuple(n for n in dataset.coicop_options if n in top)  # sidebar option order
+    views = [ViewSpec((g,), ("All-items HICP",)) for g in geos]
+    if divisions:
+        views += [ViewSpec((g,), divisions) for g in geos if g != "EU"]
+    return views
+
+def _charts(sel, spec: ViewSpec) -> dict:
+    """chart name -> (fig, extra, title), built exactly as the app's tabs build them."""
+    f = sel.to_frame(rate_labels=RATE_LABELS)
+    latest = sel.latest(rate_labels=RATE_LABELS)
+    geos, cats = list(spec.geos), list(spec.cats)
+    label = f"{', '.join(geos)} — {', '.join(cats) if len(cats) < 4 else f'{len(cats)} categories'}"
+    out = {}
+    for name in spec.charts:
+        if name in LINE_TITLES:
+            fig, extra = line_figure(f, name, LINE_TITLES[name], geos, cats,
+                                     spec.separate_countries, spec.separate_categories)
+        elif name == "latest_by_country":
+            fig, extra = latest_by_country_figure(latest)
+        elif name == "by_category_latest":
+            fig, extra = by_category_latest_figure(latest)
+        else:
+            raise ValueError(f"unknown chart {name!r}; expected one of {CHARTS}")
+        out[name] = fig, extra, f"{fig.layout.title.text} · {label}"
+    return out
+
+# ----- Worker side: one dataset per process, opened once -----
+_DATASET = None
+
+def _init_worker(path: str) -> None:
+    global _DATASET
+    _DATASET = open_dataset(Path(path))
+
+def _render(spec: ViewSpec, vdir: str, inline_js: bool) -> dict:
+    cube = _DATASET
+    if cube.version != Path(vdir).name:
+        raise RuntimeError(f"data changed while rendering: {cube.version} != {Path(vdir).name}")
+    months = cube.month_labels
+    dr_start, dr_end = month_bounds(spec.start or months[0], spec.end or months[-1])
+    sel = cube.select(list(spec.geos), list(spec.cats), dr_start, dr_end)
+    if sel.empty:
+        return {}
+    # the keys main.py looks them up by: sel_key for the bar views, plus the facet flags for the lines
+    sel_key = selection_key(cube, dict(dr_start=dr_start, dr_end=dr_end, eff_geos=spec.geos, eff_cats=spec.cats))
+    fig_key = (*sel_key, spec.separate_countries, spec.separate_categories)
+    entries = {}
+    for name, (fig, extra, title) in _charts(sel, spec).items():
+        key, entry = write_snapshot(Path(vdir), name, fig_key if name in LINE_TITLES else sel_key,
+                                    fig, extra, title, inline_js)
+        entries[key] = entry
+    return entries
+
+def prerender(path: Path, specs=None, root: Path = VIEWS_DIR, workers: int | None = None,
+              inline_js: bool = False) -> Path:
+    """Render `specs` (default: standard_views) for the data at `path`; returns the version dir."""
+    dataset = open_dataset(path)
+    if specs is None:
+        specs = standard_views(dataset, allowed=None if isinstance(dataset, ParquetStore) else ALLOWED)
+    vdir = version_dir(dataset.version, root)
+    vdir.mkdir(parents=True, exist_ok=True)
+    if not inline_js:
+        (vdir / PLOTLY_JS).write_text(get_plotlyjs(), encoding="utf-8")
+
+    entries = {}
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(str(path),)) as pool:
+        for part in pool.map(_render, specs, [str(vdir)] * len(specs), [inline_js] * len(specs)):
+            entries.update(part)
+    write_manifest(vdir, entries)
+
+    dirs = sorted((d for d in Path(root).iterdir() if d.is_dir()), key=lambda d: d.stat().st_mtime)
+    for old in dirs[:-2]:  # keep this version and the previous one
+        if old != vdir:
+            shutil.rmtree(old, ignore_errors=True)
+    return vdir
+
+def read_views(path: Path) -> list:
+    names = {f.name for f in fields(ViewSpec)}
+    specs = []
+    for item in json.loads(Path(path).read_text(encoding="utf-8")):
+        unknown = set(item).difference(names)
+        if unknown:
+            raise ValueError(f"unknown view fields: {sorted(unknown)}")
+        specs.append(ViewSpec(**{k: tuple(v) if isinstance(v, list) else v for k, v in item.items()}))
+    return specs
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Pre-render the standard HICP views to HTML/JSON snapshots.")
+    ap.add_argument("data", nargs="?", default=os.environ.get("HICP_DATA", str(Path("data") / "data hicp.csv")),
+                    help="CSV or Parquet store (default: HICP_DATA, as in main.py)")
+    ap.add_argument("--out", default=str(VIEWS_DIR), help="snapshot root (default: HICP_VIEWS_DIR)")
+    ap.add_argument("--views", help="JSON list of views instead of the standard set")
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--inline-js", action="store_true", help="embed plotly.js in every page")
+    ap.add_argument("--plotly-bundle", action="store_true",
+                    help="only write the app's plotly.js bundle (install step), no snapshots")
+    a = ap.parse_args(argv)
+    if write_plotly_bundle():
+        print(f"{PLOTLY_BUNDLE} (plotly.js {get_plotlyjs_version()})")
+    if a.plotly_bundle:
+        return
+    t0 = time.perf_counter()
+    specs = read_views(Path(a.views)) if a.views else None
+    vdir = prerender(Path(a.data), specs, Path(a.out), a.workers, a.inline_js)
+    print(f"{vdir} ({len(read_manifest(vdir))} figures, {time.perf_counter() - t0:.1f}s)")
+
+if __name__ == "__main__":
+    main()
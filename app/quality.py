@@ -0,0 +1,210 @@
+# quality.py — data-quality report per dataset version
+"""
+Checks run once per dataset version (refresh.py computes the report when it
+loads a version, off the request path), each a bulk array op over the
+(geo, coicop, month) cube:
+
+- gaps: months missing inside a series' observed span, and series that stop
+  STALE_MONTHS or more months before the newest month of the dataset ("stale";
+  a month or two behind is the usual release lag of some countries)
+- duplicates: (geo, coicop, month) cells given more than once in the source
+  (the last row wins in the cube)
+- outliers: monthly rates whose residual (the rate minus its series' median for
+  the same calendar month) has a robust z-score, 0.6745 · (r − median) / MAD over
+  a centred window of ±OUTLIER_WINDOW months, above OUTLIER_Z. The local window
+  keeps a regime like the 2021-23 surge from flagging wholesale, and the MAD is
+  at least the series' own and MAD_FLOOR, so near-flat series do not flag
+  rounding steps. Annual rates are not scored: each is the sum of 12 monthly
+  moves and would repeat every monthly event a dozen times.
+- revisions: index values that changed, or disappeared, since the previous version
+
+A Parquet store is scanned `block` geos at a time, so memory stays bounded.
+"""
+from __future__ import annotations
+import time
+import warnings
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from cube import HicpCube, take_padded
+
+OUTLIER_Z = 3.5        # Iglewicz & Hoaglin's cut-off for the modified z-score
+OUTLIER_WINDOW = 12    # months either side of the scored one
+MAD_FLOOR = 0.2        # percentage points
+WINDOW_VALUES = 1 << 22  # sliding-window values per chunk of series (bounds the temporaries)
+STALE_MONTHS = 3       # months behind the newest month from which a series is stale
+REVISION_TOL = 1e-6    # index points; the source publishes two decimals
+SCAN_BLOCK = 16        # geos per block when scanning a store
+
+@dataclass(frozen=True, eq=False)
+class QualityReport:
+    version: str
+    previous: str | None    # version the revisions are measured against
+    series: int             # observed (geo, coicop) series
+    cells: int              # observed (geo, coicop, month) cells
+    gaps: pd.DataFrame      # geo, coicop, first, last, missing, first_missing, stale
+    duplicates: pd.DataFrame  # geo, coicop, month, rows
+    outliers: pd.DataFrame  # geo, coicop, date, mom_%, yoy_%, expected (mom), robust_z
+    revisions: pd.DataFrame  # geo, coicop, date, old, new, change
+    seconds: float
+
+    def summary(self) -> dict:
+        return {
+            "Series with gaps": int((self.gaps["missing"] > 0).sum()),
+            "Missing months": int(self.gaps["missing"].sum()),
+            "Stale series": int(self.gaps["stale"].sum()),
+            "Duplicate cells": len(self.duplicates),
+            "Rate outliers": len(self.outliers),
+            "Revised values": len(self.revisions),
+        }
+
+# ----- Checks on one cube -----
+def find_gaps(cube: HicpCube, stale_months: int = STALE_MONTHS) -> pd.DataFrame:
+    """
+    Series with months missing between their first and last observation, or
+    ending `stale_months` or more months before the cube does.
+    """
+    obs = ~np.isnan(cube.index)
+    T = obs.shape[-1]
+    has = obs.any(axis=-1)
+    first = np.argmax(obs, axis=-1) if T else np.zeros(has.shape, dtype=np.intp)
+    last = T - 1 - np.argmax(obs[..., ::-1], axis=-1) if T else first
+    missing = np.where(has, (last - first + 1) - obs.sum(axis=-1), 0)
+    stale = has & (last <= T - 1 - stale_months)
+    g, c = np.nonzero((missing > 0) | stale)
+    t = np.arange(T)
+    inside = ~obs[g, c] & (t >= first[g, c, None]) & (t <= last[g, c, None])
+    months = cube.months.values
+    nat = np.datetime64("NaT", "ns")
+    return pd.DataFrame({
+        "geo": cube.geos[g], "coicop": cube.coicops[c],
+        "first": months[first[g, c]] if T else months[:0], "last": months[last[g, c]] if T else months[:0],
+        "missing": missing[g, c].astype(np.int64),
+        "first_missing": np.where(missing[g, c] > 0, months[np.argmax(inside, axis=-1)] if T else months[:0], nat),
+        "stale": stale[g, c],
+    })
+
+def _nanmedian(x: np.ndarray) -> np.ndarray:
+    """Median over the last axis ignoring NaN, by one sort (NaN sorts last); NaN if all NaN."""
+    s = np.sort(x, axis=-1)
+    n = (~np.isnan(x)).sum(axis=-1, keepdims=True)
+    lo = np.take_along_axis(s, np.maximum((n - 1) // 2, 0), axis=-1)
+    hi = np.take_along_axis(s, np.maximum(n // 2, 0) if s.shape[-1] else n, axis=-1)
+    out = (lo + hi) / 2.0
+    out[n == 0] = np.nan
+    return out
+
+def seasonal_residuals(x: np.ndarray, months: pd.DatetimeIndex) -> tuple:
+    """(x minus its series' median for the same calendar month, that median) on x's shape."""
+    seasonal = np.full(x.shape, np.nan)
+    cal = np.asarray(months.month)
+    for m in np.unique(cal):
+        seasonal[..., cal == m] = _nanmedian(x[..., cal == m])
+    return x - seasonal, seasonal
+
+def robust_z(x: np.ndarray, window: int = OUTLIER_WINDOW, floor: float = MAD_FLOOR) -> tuple:
+    """
+    (modified z-score, local median) per series (last axis) against the
+    median / MAD of the ±`window` months around each value; the MAD is at least
+    the series' own MAD and `floor`. NaN where x is NaN.
+    """
+    shape = x.shape
+    flat = x.reshape(-1, shape[-1]) if shape[-1] else x.reshape(0, 0)
+    z, center = np.full(flat.shape, np.nan), np.full(flat.shape, np.nan)
+    if not flat.size:
+        return z.reshape(shape), center.reshape(shape)
+    width = 2 * window + 1
+    padded = np.pad(flat, ((0, 0), (window, window)), constant_values=np.nan)
+    step = max(1, WINDOW_VALUES // (shape[-1] * width))
+    for i in range(0, len(flat), step):
+        rows = slice(i, i + step)
+        w = sliding_window_view(padded[rows], width, axis=-1)  # (rows, T, width), a view
+        med = _nanmedian(w)[..., 0]
+        mad = _nanmedian(np.abs(w - med[..., None]))[..., 0]
+        series_mad = _nanmedian(np.abs(flat[rows] - _nanmedian(flat[rows])))
+        scale = np.fmax(np.fmax(mad, series_mad), floor)
+        z[rows] = 0.6745 * (flat[rows] - med) / scale
+        center[rows] = med
+    return z.reshape(shape), center.reshape(shape)
+
+def find_outliers(cube: HicpCube, threshold: float = OUTLIER_Z) -> pd.DataFrame:
+    """Monthly rates far from their seasonal and local norm (see the module docstring)."""
+    resid, seasonal = seasonal_residuals(cube.mom, cube.months)
+    z, center = robust_z(resid)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        g, c, t = np.nonzero(np.abs(z) > threshold)
+    return pd.DataFrame({
+        "geo": cube.geos[g], "coicop": cube.coicops[c], "date": cube.months[t],
+        "mom_%": cube.mom[g, c, t], "yoy_%": cube.yoy[g, c, t],
+        "expected": seasonal[g, c, t] + center[g, c, t], "robust_z": z[g, c, t],
+    })
+
+def find_revisions(cube: HicpCube, old: HicpCube, tol: float = REVISION_TOL) -> pd.DataFrame:
+    """Cells observed in `old` whose value changed or vanished in `cube` (aligned by codes and month)."""
+    gi = pd.Index(old.geos).get_indexer(cube.geos)
+    ci = pd.Index(old.coicops).get_indexer(cube.coicops)
+    ti = np.arange(len(cube.months)) + (old.month_offset(cube.months[0]) if len(cube.months) else 0)
+    ti[(ti < 0) | (ti >= len(old.months))] = -1
+    before = take_padded(old.index, gi, ci, ti)
+    with np.errstate(invalid="ignore"):
+        changed = ~np.isnan(before) & ~(np.abs(cube.index - before) <= tol)  # NaN new -> removed
+    g, c, t = np.nonzero(changed)
+    new = cube.index[g, c, t]
+    return pd.DataFrame({
+        "geo": cube.geos[g], "coicop": cube.coicops[c], "date": cube.months[t],
+        "old": before[g, c, t], "new": new, "change": new - before[g, c, t],
+    })
+
+def _duplicates_frame(records) -> pd.DataFrame:
+    return pd.DataFrame(list(records), columns=["geo", "coicop", "month", "rows"])
+
+# ----- Whole dataset -----
+def _blocks(dataset, block: int):
+    if isinstance(dataset, HicpCube):
+        yield dataset
+    else:
+        yield from dataset.scan(block)
+
+def _previous_block(previous, cube: HicpCube):
+    if previous is None or isinstance(previous, HicpCube):
+        return previous
+    return previous.read_geos(cube.geos)
+
+def quality_report(dataset, previous=None, block: int = SCAN_BLOCK) -> QualityReport:
+    """Run every check over `dataset` (HicpCube or ParquetStore), revisions against `previous`."""
+    t0 = time.perf_counter()
+    if previous is not None and previous.version == dataset.version:
+        previous = None
+    gaps, dups, outliers, revisions = [], [], [], []
+    series = cells = 0
+    for cube in _blocks(dataset, block):
+        obs = ~np.isnan(cube.index)
+        series += int(obs.any(axis=-1).sum())
+        cells += int(obs.sum())
+        gaps.append(find_gaps(cube))
+        dups.append(_duplicates_frame(cube.duplicates))
+        outliers.append(find_outliers(cube))
+        old = _previous_block(previous, cube)
+        if old is not None:
+            revisions.append(find_revisions(cube, old))
+
+    if not gaps:  # a store without geos: the checks' empty frames
+        empty = HicpCube.from_values(*(np.array([], dtype=object),) * 4, pd.DatetimeIndex([]),
+                                     np.empty((0, 0, 0)))
+        gaps, dups, outliers = [find_gaps(empty)], [_duplicates_frame(())], [find_outliers(empty)]
+
+    def concat(parts):
+        return pd.concat([p for p in parts if len(p)] or parts[:1], ignore_index=True)
+
+    return QualityReport(
+        version=dataset.version, previous=None if previous is None else previous.version,
+        series=series, cells=cells, gaps=concat(gaps), duplicates=concat(dups),
+        outliers=concat(outliers).sort_values("robust_z", key=np.abs, ascending=False, ignore_index=True),
+        revisions=concat(revisions) if revisions else pd.DataFrame(
+            columns=["geo", "coicop", "date", "old", "new", "change"]),
+        seconds=time.perf_counter() - t0,
+    )
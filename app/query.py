@@ -0,0 +1,112 @@
+# query.py — UI-independent queries: filters -> series, KPIs, latest values
+"""
+What the dashboard computes, without Streamlit: main.py and the HTTP API
+(api.py) both go through these functions, on the same process-wide
+LiveDataset per data path.
+"""
+from __future__ import annotations
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from filters import month_bounds
+from lru import LRUCache
+from refresh import LiveDataset
+from weights import AGGREGATES, HicpWeights, aggregate, load_weights
+
+class QueryError(ValueError):
+    """A query the dataset cannot answer (unknown geo or COICOP, malformed month)."""
+
+_LIVE: dict = {}
+_LIVE_LOCK = threading.Lock()
+
+def live_dataset(path: Path) -> LiveDataset:
+    """The process-wide LiveDataset of `path`: loaded and started once, shared by every caller."""
+    key = Path(path).resolve()
+    with _LIVE_LOCK:
+        live = _LIVE.get(key)
+        if live is None:
+            live = _LIVE[key] = LiveDataset(path).start()
+    return live
+
+_WEIGHTS = LRUCache(maxsize=4)  # (path, size, mtime) -> HicpWeights
+
+def weights_at(path: Path) -> HicpWeights | None:
+    """Weights file at `path` (None if absent), re-read when it changes."""
+    try:
+        info = os.stat(path)
+    except OSError:
+        return None
+    return _WEIGHTS.get_or_build((str(path), info.st_size, info.st_mtime_ns), lambda: load_weights(path))
+
+def _names(values, codes, names, what: str) -> list | None:
+    """Codes or display names -> display names in the given order; None means all."""
+    if not values:
+        return None
+    by_code = dict(zip(codes, names))
+    known = set(names)
+    out = []
+    for v in values:
+        name = by_code.get(v, v)
+        if name not in known:
+            raise QueryError(f"unknown {what}: {v!r}")
+        if name not in out:
+            out.append(name)
+    return out
+
+def query_params(dataset, geos=None, coicops=None, start=None, end=None) -> dict:
+    """
+    The params dict `filters.build_sidebar` returns, from geo / COICOP codes or
+    names (none = all) and "YYYY-MM" bounds (none = the full range).
+    """
+    months = dataset.month_labels
+    if not months:
+        raise QueryError("the dataset is empty")
+    try:
+        dr_start, dr_end = month_bounds(start or months[0], end or months[-1])
+    except ValueError as exc:
+        raise QueryError(f"malformed month: {exc}") from None
+    return dict(
+        dr_start=dr_start, dr_end=dr_end,
+        eff_geos=_names(geos, dataset.geos, dataset.geo_names, "geo") or dataset.geo_options,
+        eff_cats=_names(coicops, dataset.coicops, dataset.coicop_names, "coicop") or dataset.coicop_options,
+        separate_countries=False, separate_categories=False,
+    )
+
+def selection_key(dataset, params: dict) -> tuple:
+    """
+    Cache key of everything derived from a selection; geos and categories are
+    sorted, since the selection comes back in axis order whatever order they were picked in.
+    """
+    return (dataset.version, params["dr_start"], params["dr_end"],
+            tuple(sorted(params["eff_geos"])), tuple(sorted(params["eff_cats"])))
+
+def weighted_aggregates(sel, weights: HicpWeights | None, sel_key: tuple):
+    """weights.Aggregates of the selection, memoized per weights version and selection."""
+    if weights is None:
+        return None
+    return AGGREGATES.get_or_build((weights.version, *sel_key), lambda: aggregate(sel, weights))
+
+def kpis(sel, agg=None) -> dict:
+    """
+    Newest month of the selection and its annual / monthly rate: weighted when
+    `agg` is given and has weights for that month, else the mean over the
+    series observed in that month.
+    """
+    t = sel.latest_month()
+    if t is None:
+        return dict(month=None, annual=np.nan, monthly=np.nan, weighted=agg is not None)
+    annual = monthly = np.nan
+    if agg is not None:
+        annual, monthly = agg.total["yoy_%"][t], agg.total["mom_%"][t]
+    weighted = not (np.isnan(annual) and np.isnan(monthly))
+    if not weighted:
+        observed = ~np.isnan(sel.index[..., t])
+        annual, monthly = (_nanmean(r[..., t][observed]) for r in (sel.yoy, sel.mom))
+    return dict(month=sel.months[t], annual=float(annual), monthly=float(monthly), weighted=weighted)
+
+def _nanmean(values: np.ndarray) -> float:
+    values = values[~np.isnan(values)]
+    return float(values.mean()) if len(values) else np.nan
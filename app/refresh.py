@@ -0,0 +1,179 @@
+# refresh.py — background reload of the served dataset with an atomic swap
+"""
+`LiveDataset` owns the dataset every session reads. A daemon thread polls the
+source (the CSV, or a Parquet store's catalog) and, when it changed, builds
+the new version off the request path, validates it, warms its lookups and
+only then replaces the reference in one assignment. A rerun pins the
+`state` it read once (dataset, load time, quality report, last error), so it
+finishes on a consistent version; the old one is freed when the last rerun
+holding it ends.
+
+Each refreshed version gets its data-quality report (quality.py) before the
+swap, with revisions measured against the version it replaces. The first
+version is served as soon as it is loaded; its report (revisions against the
+previous snapshot of the CSV, if one was kept) follows from the background
+thread, so a cold start never waits for a full scan of a Parquet store.
+
+Optionally (HICP_INGEST_SECONDS > 0) the thread also appends new Eurostat
+months to the CSV with `ingest.update_csv` before polling.
+"""
+from __future__ import annotations
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, replace
+from pathlib import Path
+
+from loader import load_previous_cube
+from quality import QualityReport, quality_report
+from store import CATALOG, open_dataset
+
+log = logging.getLogger("hicp.refresh")
+
+REFRESH_SECONDS = float(os.environ.get("HICP_REFRESH_SECONDS", 60))  # 0 disables polling
+INGEST_SECONDS = float(os.environ.get("HICP_INGEST_SECONDS", 0))     # 0 disables ingest
+
+@dataclass(frozen=True)
+class DatasetVersion:
+    dataset: object    # HicpCube or ParquetStore
+    stamp: tuple       # (size, mtime_ns) of the source when it was read
+    loaded_at: float   # time.time() of the swap
+    quality: QualityReport | None = None
+    error: str | None = None  # last failed refresh / ingest since this version was served
+
+def source_stamp(path: Path) -> tuple:
+    """Cheap change check: size and mtime of the CSV, or of a store's catalog."""
+    path = Path(path)
+    info = os.stat(path / CATALOG if path.is_dir() else path)
+    return info.st_size, info.st_mtime_ns
+
+def validate(new, old=None) -> None:
+    """Reject datasets that would make the app worse than the one being served."""
+    if not len(new.months) or not len(new.geos) or not len(new.coicops):
+        raise ValueError("new dataset is empty")
+    if old is not None and new.months[-1] < old.months[-1]:
+        raise ValueError(f"newest month went back from {old.months[-1]:%Y-%m} to {new.months[-1]:%Y-%m}")
+
+def warm(dataset) -> None:
+    """Build the per-dataset lookups now rather than in the first rerun that needs them."""
+    dataset.month_labels, dataset.geo_options, dataset.coicop_options
+
+class LiveDataset:
+    """The current dataset version plus the thread that replaces it."""
+
+    def __init__(self, path: Path, interval: float = REFRESH_SECONDS,
+                 ingest_interval: float = INGEST_SECONDS, loader=open_dataset):
+        self.path = Path(path)
+        self.interval = interval
+        self.ingest_interval = ingest_interval
+        self.loader = loader
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._last_ingest = 0.0
+        self._failed_stamp = None  # source state that failed to load; retried once it changes
+        self._current = self._load(quality=False)  # the report follows from the thread
+
+    def current(self):
+        """The dataset to use for a whole rerun."""
+        return self._current.dataset
+
+    @property
+    def state(self) -> DatasetVersion:
+        """Dataset, load time, quality report and last error of the served version, read together."""
+        return self._current
+
+    @property
+    def version(self) -> str:
+        return self._current.dataset.version
+
+    @property
+    def loaded_at(self) -> float:
+        return self._current.loaded_at
+
+    @property
+    def quality(self) -> QualityReport | None:
+        return self._current.quality
+
+    @property
+    def last_error(self) -> str | None:
+        return self._current.error
+
+    def _fail(self, message: str) -> None:
+        self._current = replace(self._current, error=message)
+
+    def _load(self, old=None, stamp=None, quality: bool = True) -> DatasetVersion:
+        stamp = stamp or source_stamp(self.path)
+        dataset = self.loader(self.path)
+        validate(dataset, old)
+        warm(dataset)
+        return DatasetVersion(dataset, stamp, time.time(), self._quality(dataset, old) if quality else None)
+
+    def _first_quality(self) -> None:
+        """Report of the version loaded at startup, attached unless a refresh replaced it meanwhile."""
+        cur = self._current
+        if cur.quality is None:
+            report = self._quality(cur.dataset, None)
+            if self._current is cur:
+                self._current = replace(cur, quality=report)
+
+    def _quality(self, dataset, old) -> QualityReport | None:
+        """The report is informative: a failure is logged and does not block the swap."""
+        try:
+            previous = old if old is not None or self.path.is_dir() else load_previous_cube(self.path)
+            report = quality_report(dataset, previous)
+            log.info("quality %s: %s (%.2fs)", dataset.version, report.summary(), report.seconds)
+            return report
+        except Exception as exc:
+            log.warning("quality report for %s failed: %s: %s", dataset.version, type(exc).__name__, exc)
+            return None
+
+    def refresh(self, force: bool = False) -> bool:
+        """Reload if the source changed; True when a new dataset was swapped in."""
+        stamp = None
+        try:
+            stamp = source_stamp(self.path)
+            if not force and stamp in (self._current.stamp, self._failed_stamp):
+                return False
+            cur = self._current
+            new = self._load(cur.dataset, stamp)
+            self._current = new  # the swap: one reference assignment
+            log.info("swapped dataset %s -> %s", cur.dataset.version, new.dataset.version)
+            return True
+        except Exception as exc:  # keep serving the current version
+            self._failed_stamp = stamp
+            self._fail(f"{type(exc).__name__}: {exc}")
+            log.warning("refresh of %s failed: %s", self.path, self.last_error)
+            return False
+
+    def _ingest(self) -> None:
+        if self.ingest_interval <= 0 or self.path.is_dir():
+            return
+        if time.monotonic() - self._last_ingest < self.ingest_interval:
+            return
+        self._last_ingest = time.monotonic()
+        try:
+            from ingest import update_csv
+            n = update_csv(self.path)
+            if n:
+                log.info("ingested %d new rows into %s", n, self.path)
+        except Exception as exc:
+            self._fail(f"ingest: {type(exc).__name__}: {exc}")
+            log.warning("%s", self.last_error)
+
+    def _run(self) -> None:
+        self._first_quality()
+        if self.interval <= 0:
+            return
+        while not self._stop.wait(self.interval):
+            self._ingest()
+            self.refresh()
+
+    def start(self) -> "LiveDataset":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="hicp-refresh", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
@@ -0,0 +1,79 @@
+# snapshots.py — pre-rendered figures on disk, keyed by data version and filter state
+"""
+`python prerender.py` writes every standard view once per data version:
+
+    <views dir>/<data version>/manifest.json   key -> chart name, title, extra
+    <views dir>/<data version>/<key>.json      Plotly figure JSON (served by the app)
+    <views dir>/<data version>/<key>.html      standalone page (static site)
+    <views dir>/<data version>/index.html      links to every page
+
+A key hashes the same tuple the figure cache uses (chart name, data version,
+date range, geos, categories, facet flags), so a figure-cache miss in the app
+finds a snapshot exactly when the sidebar state matches the view it was built
+for. Lookups are a dict check against the manifest, re-read only when it changes.
+"""
+from __future__ import annotations
+import hashlib
+import html
+import json
+import os
+from pathlib import Path
+
+import plotly.io as pio
+
+from lru import LRUCache
+
+VIEWS_DIR = Path(os.environ.get("HICP_VIEWS_DIR", Path("data") / "views"))
+MANIFEST = "manifest.json"
+PLOTLY_JS = "plotly.min.js"  # shared by the pages of a version unless --inline-js
+
+_MANIFESTS = LRUCache(maxsize=4)  # (dir, size, mtime) -> manifest dict
+
+def snapshot_key(name: str, fig_key: tuple) -> str:
+    """Stable file-name key of (chart name, *figure-cache key)."""
+    ident = json.dumps([name, *fig_key], default=str)  # timestamps as ISO-like strings
+    return hashlib.blake2b(ident.encode("utf-8"), digest_size=12).hexdigest()
+
+def version_dir(version: str, root: Path | None = None) -> Path:
+    return Path(root or VIEWS_DIR) / version
+
+def read_manifest(vdir: Path) -> dict:
+    try:
+        info = os.stat(vdir / MANIFEST)
+    except OSError:
+        return {}
+    return _MANIFESTS.get_or_build((str(vdir), info.st_size, info.st_mtime_ns),
+                                   lambda: json.loads((vdir / MANIFEST).read_text(encoding="utf-8")))
+
+def load_snapshot(name: str, fig_key: tuple, root: Path | None = None):
+    """(fig, extra) of the pre-rendered view matching `fig_key`, or None."""
+    vdir = version_dir(fig_key[0], root)
+    key = snapshot_key(name, fig_key)
+    entry = read_manifest(vdir).get(key)
+    if entry is None:
+        return None
+    try:
+        return pio.from_json((vdir / f"{key}.json").read_text(encoding="utf-8")), entry.get("extra")
+    except (OSError, ValueError):
+        return None  # pruned or half-written -> build as usual
+
+def write_snapshot(vdir: Path, name: str, fig_key: tuple, fig, extra=None, title: str = "",
+                   inline_js: bool = False) -> tuple:
+    """Write one view's JSON and HTML; returns its (key, manifest entry)."""
+    key = snapshot_key(name, fig_key)
+    (vdir / f"{key}.json").write_text(fig.to_json(), encoding="utf-8")
+    fig.write_html(vdir / f"{key}.html", include_plotlyjs=True if inline_js else PLOTLY_JS,
+                   full_html=True)
+    return key, dict(name=name, title=title, extra=extra)
+
+def write_manifest(vdir: Path, entries: dict) -> None:
+    """Publish a version's snapshots: index page, then the manifest (atomically)."""
+    links = "\n".join(f'<li><a href="{k}.html">{html.escape(e["title"])}</a></li>'
+                      for k, e in sorted(entries.items(), key=lambda kv: kv[1]["title"]))
+    (vdir / "index.html").write_text(
+        f"<!doctype html><meta charset='utf-8'><title>EU HICP views</title>"
+        f"<h1>EU HICP views</h1><p>Data version {html.escape(vdir.name)}</p><ul>\n{links}\n</ul>\n",
+        encoding="utf-8")
+    tmp = vdir / f"{MANIFEST}.{os.getpid()}.tmp"
+    tmp.write_text(json.dumps(entries), encoding="utf-8")
+    os.replace(tmp, vdir / MANIFEST)
@@ -0,0 +1,195 @@
+# store.py — out-of-core backend: Parquet partitioned by geo and year
+"""
+For extracts that should not be held in memory as a whole (every geo and
+COICOP aggregate of prc_hicp_midx over decades). Layout:
+
+    <store>/_catalog.json                            axes, names, month range, version,
+                                                     and the current generation <gen>
+    <store>/<gen>/geo=<code>/year=<yyyy>/*.parquet   coicop, month, index
+
+A rebuild writes a new generation and then replaces the catalog atomically;
+the previous generation is kept, so a process still reading it (see
+refresh.py) is not cut off mid-query.
+
+Only the catalog is kept in memory. `select` reads the selected geos' year
+partitions with the COICOP filter and column projection pushed down to
+pyarrow.dataset, and returns an HicpCube of just that window, so the rest of
+the app is unchanged. Build a store with
+
+    python store.py "data/data hicp.csv" data/hicp_store
+
+and point the app at it with HICP_DATA=data/hicp_store.
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from cube import CubeAxes, HicpCube, _gather, duplicate_cells
+from lru import LRUCache
+from loader import clean_observations, data_version, load_cube, source_fingerprint
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+CATALOG = "_catalog.json"
+CHUNK_ROWS = 500_000  # CSV rows per streamed chunk while building
+RATE_LOOKBACK = 12    # months read before the window so MoM/YoY are complete
+
+def _partitioning():
+    return ds.partitioning(pa.schema([("geo", pa.string()), ("year", pa.int16())]), flavor="hive")
+
+def _schema():
+    return pa.schema([("geo", pa.string()), ("year", pa.int16()), ("coicop", pa.string()),
+                      ("month", pa.int8()), ("index", pa.float64())])
+
+def build_store(csv: Path, root: Path, chunk_rows: int = CHUNK_ROWS) -> Path:
+    """
+    Stream `csv` into a partitioned store at `root` without loading it whole.
+    The new store replaces an existing one only once it is complete.
+    """
+    csv, root = Path(csv), Path(root)
+    geo_names, coicop_names = {}, {}
+    months = [None, None]
+    schema = _schema()
+
+    def batches():
+        chunks = pd.read_csv(csv, encoding="utf-8", on_bad_lines="skip", chunksize=chunk_rows)
+        for raw in chunks:
+            df = clean_observations(raw)
+            if df.empty:
+                continue
+            for code, name, names in (("geo", "geo_name", geo_names), ("coicop", "coicop_name", coicop_names)):
+                pairs = df[[code, name]].drop_duplicates(code).astype(str)
+                for k, v in zip(pairs[code], pairs[name]):
+                    names.setdefault(k, v)  # first occurrence, like HicpCube.from_frame
+            ym = df["year"].to_numpy("int64") * 12 + df["month"].to_numpy("int64") - 1
+            lo, hi = int(ym.min()), int(ym.max())
+            months[0] = lo if months[0] is None else min(months[0], lo)
+            months[1] = hi if months[1] is None else max(months[1], hi)
+            yield pa.RecordBatch.from_pandas(pd.DataFrame({
+                "geo": df["geo"].astype(str), "year": df["year"].to_numpy("int16"),
+                "coicop": df["coicop"].astype(str), "month": df["month"].to_numpy("int8"),
+                "index": df["index"].to_numpy(float),
+            }), schema=schema, preserve_index=False)
+
+    root.mkdir(parents=True, exist_ok=True)
+    gen = f"gen-{time.time_ns()}"
+    tmp = root / f"{gen}.tmp"
+    ds.write_dataset(batches(), tmp, schema=schema, format="parquet", partitioning=_partitioning(),
+                     max_rows_per_group=1 << 16, existing_data_behavior="overwrite_or_ignore")
+    os.replace(tmp, root / gen)
+
+    geos = sorted(geo_names)
+    coicops = sorted(coicop_names)
+    t0, t1 = months if months[0] is not None else (0, -1)
+    catalog = dict(
+        version=data_version(source_fingerprint(csv)), data=gen,
+        geos=geos, geo_names=[geo_names[g] for g in geos],
+        coicops=coicops, coicop_names=[coicop_names[c] for c in coicops],
+        first_month=f"{t0 // 12:04d}-{t0 % 12 + 1:02d}", n_months=t1 - t0 + 1,
+    )
+    previous = _read_catalog(root).get("data") if (root / CATALOG).is_file() else None
+    tmp_catalog = root / f"{CATALOG}.{os.getpid()}.tmp"
+    tmp_catalog.write_text(json.dumps(catalog), encoding="utf-8")
+    os.replace(tmp_catalog, root / CATALOG)
+
+    for entry in root.iterdir():  # keep the new and the previous generation only
+        if entry.is_dir() and entry.name not in (gen, previous):
+            shutil.rmtree(entry, ignore_errors=True)
+    return root
+
+def _read_catalog(root: Path) -> dict:
+    return json.loads((Path(root) / CATALOG).read_text(encoding="utf-8"))
+
+class ParquetStore(CubeAxes):
+    """Catalog in memory, observations on disk; `select` has HicpCube's contract."""
+
+    def __init__(self, root: Path, cache_size: int = 16):
+        self.root = Path(root)
+        meta = _read_catalog(self.root)
+        self.version = meta["version"]
+        self.geos = np.array(meta["geos"], dtype=object)
+        self.geo_names = np.array(meta["geo_names"], dtype=object)
+        self.coicops = np.array(meta["coicops"], dtype=object)
+        self.coicop_names = np.array(meta["coicop_names"], dtype=object)
+        self.months = pd.date_range(meta["first_month"], periods=meta["n_months"], freq="MS")
+        self._dataset = ds.dataset(self.root / meta["data"], format="parquet", partitioning=_partitioning(),
+                                   exclude_invalid_files=True)
+        self._cache = LRUCache(cache_size)  # recent selections; cubes are read-only, so shared
+
+    def arrays(self) -> dict:
+        """The catalog's ndarrays by name (for memory accounting)."""
+        return dict(geos=self.geos, geo_names=self.geo_names, coicops=self.coicops,
+                    coicop_names=self.coicop_names, months=self.months.values)
+
+    def select(self, geo_names=None, coicop_names=None, start=None, end=None) -> HicpCube:
+        """Sub-cube for the given display names and [start, end], read from disk."""
+        gi = np.arange(len(self.geos))[_gather(self._geo_lookup, geo_names, len(self.geos))]
+        ci = np.arange(len(self.coicops))[_gather(self._coicop_lookup, coicop_names, len(self.coicops))]
+        t = self.month_slice(start, end)
+        key = (gi.tobytes(), ci.tobytes(), t.start, t.stop)
+        return self._cache.get_or_build(key, lambda: self._read(gi, ci, t))
+
+    def _read(self, gi: np.ndarray, ci: np.ndarray, t: slice, duplicates: bool = False) -> HicpCube:
+        lo = max(t.start - RATE_LOOKBACK, 0)
+        months = self.months[lo:t.stop]
+        geos, coicops = self.geos[gi], self.coicops[ci]
+        values = np.full((len(gi), len(ci), len(months)), np.nan)
+        found = ()
+        if len(gi) and len(ci) and len(months):
+            ym0 = months[0].year * 12 + months[0].month - 1
+            f = ds.field("geo").isin(geos.tolist())
+            f &= (ds.field("year") >= months[0].year) & (ds.field("year") <= months[-1].year)
+            if len(ci) < len(self.coicops):
+                f &= ds.field("coicop").isin(coicops.tolist())
+            table = self._dataset.to_table(columns=["geo", "coicop", "year", "month", "index"], filter=f)
+            tt = (table["year"].to_numpy().astype(np.int64) * 12
+                  + table["month"].to_numpy().astype(np.int64) - 1 - ym0)
+            keep = (tt >= 0) & (tt < len(months))
+            g = pd.Index(geos).get_indexer(table["geo"].to_numpy())
+            c = pd.Index(coicops).get_indexer(table["coicop"].to_numpy())
+            values[g[keep], c[keep], tt[keep]] = table["index"].to_numpy()[keep]
+            if duplicates:
+                found = tuple((geos[g], coicops[c], months[t].strftime("%Y-%m"), int(n)) for g, c, t, n
+                              in duplicate_cells(g[keep], c[keep], tt[keep], values.shape))
+        cube = HicpCube.from_values(geos, self.geo_names[gi], coicops, self.coicop_names[ci],
+                                    months, values, self.version, found)
+        if t.start == lo:
+            return cube
+        return cube.select(None, None, months[0] + pd.DateOffset(months=t.start - lo), None)
+
+    def read_geos(self, codes) -> HicpCube:
+        """Every COICOP and month of the given geo codes (uncached), with their duplicate cells."""
+        gi = pd.Index(self.geos).get_indexer(list(codes))
+        return self._read(gi[gi >= 0], np.arange(len(self.coicops)), slice(0, len(self.months)),
+                          duplicates=True)
+
+    def scan(self, block: int = 16):
+        """The whole store as consecutive HicpCubes of `block` geos (for full-data passes)."""
+        for i in range(0, len(self.geos), block):
+            yield self.read_geos(self.geos[i:i + block])
+
+def open_dataset(path: Path):
+    """A Parquet store directory opens lazily; a CSV file loads into memory."""
+    path = Path(path)
+    if path.is_dir():
+        return ParquetStore(path)
+    return load_cube(path)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Build a partitioned Parquet store from an HICP CSV.")
+    ap.add_argument("csv")
+    ap.add_argument("store")
+    ap.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    a = ap.parse_args(argv)
+    print(build_store(Path(a.csv), Path(a.store), a.chunk_rows))
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 # tabs.py — all charts
 from __future__ import annotations
+import pandas as pd
 import plotly.express as px
 import streamlit as st
 from helpers import (
@@ -12,10 +13,25 @@ from helpers import (
     plot_scrollable,
     _facet_grid_dims,
 )
+from figcache import FIGURES
+from snapshots import load_snapshot
+from downsample import minmax_downsample
+from timing import span
+from transforms import TRANSFORMS, derived
+
+# ----- Large-grid render mode -----
+LARGE_GRID_CELLS = 12        # facet cells from which the grid is drawn with WebGL
+LARGE_GRID_POINTS = 20_000   # ... or total points
+MARKER_POINT_LIMIT = 2_000   # markers are dropped above this many points
+SERIES_MAX_POINTS = 240      # per-series cap (min/max buckets) in large-grid mode
 
 
 def _line_chart_logic(f, ycol, title, separate_countries, separate_categories, eff_geos, eff_cats):
-    f_plot = f.copy()
+    rows, cols = _facet_grid_dims(separate_countries, separate_categories, eff_geos, eff_cats)
+    large = rows * cols >= LARGE_GRID_CELLS or len(f) >= LARGE_GRID_POINTS
+    f_plot = minmax_downsample(f, ycol, SERIES_MAX_POINTS) if large else f  # px.line does not mutate f
+    markers = len(f_plot) <= MARKER_POINT_LIMIT
+    render_mode = "webgl" if large else "auto"
     cmap_countries = country_color_map(f_plot, "geo_name")
     multi_cats = len(eff_cats) > 1
 
@@ -26,7 +42,7 @@ def _line_chart_logic(f, ycol, title, separate_countries, separate_categories, e
             color="geo_name",                # keep country colors
             facet_col="coicop_name",        # columns by Category
             facet_row="geo_name",           # rows by Country
-            markers=True,
+            markers=markers, render_mode=render_mode,
             color_discrete_map=cmap_countries,
             title=title,
             labels={"geo_name":"Country/Regions","coicop_name":"Categories","date":"Date"},
@@ -37,7 +53,7 @@ def _line_chart_logic(f, ycol, title, separate_countries, separate_categories, e
     elif separate_countries and not separate_categories:
         fig = px.line(
             f_plot, x="date", y=ycol, color="coicop_name",
-            facet_col="geo_name", facet_col_wrap=2, markers=True,
+            facet_col="geo_name", facet_col_wrap=2, markers=markers, render_mode=render_mode,
             color_discrete_sequence=CATEGORY_COLOR_SEQ, title=title,
             labels={"coicop_name":"Categories","geo_name":"Country/Regions","date":"Date"},
         )
@@ -47,7 +63,7 @@ def _line_chart_logic(f, ycol, title, separate_countries, separate_categories, e
     elif separate_categories and not separate_countries:
         fig = px.line(
             f_plot, x="date", y=ycol, color="geo_name",
-            facet_col="coicop_name", facet_col_wrap=2, markers=True,
+            facet_col="coicop_name", facet_col_wrap=2, markers=markers, render_mode=render_mode,
             color_discrete_map=cmap_countries, title=title,
             labels={"geo_name":"Country/Regions","coicop_name":"Categories","date":"Date"},
         )
@@ -59,14 +75,15 @@ def _line_chart_logic(f, ycol, title, separate_countries, separate_categories, e
             fig = px.line(
                 f_plot, x="date", y=ycol,
                 color="coicop_name", line_dash="geo_name", symbol="geo_name",
-                markers=True, color_discrete_sequence=CATEGORY_COLOR_SEQ, title=title,
+                markers=markers, render_mode=render_mode, color_discrete_sequence=CATEGORY_COLOR_SEQ, title=title,
                 labels={"geo_name":"Country/Regions","coicop_name":"Categories","date":"Date"},
             )
             color_mode = "category"
         else:
             fig = px.line(
                 f_plot, x="date", y=ycol,
-                color="geo_name", markers=True, color_discrete_map=cmap_countries, title=title,
+                color="geo_name", markers=markers, render_mode=render_mode,
+                color_discrete_map=cmap_countries, title=title,
                 labels={"geo_name":"Country/Regions","coicop_name":"Categories","date":"Date"},
             )
             color_mode = "country"
@@ -75,15 +92,29 @@ def _line_chart_logic(f, ycol, title, separate_countries, separate_categories, e
                       margin=dict(t=60, b=110))
     return fig, color_mode
 
-def render_tab_annual(f, eff_geos, eff_cats, separate_countries, separate_categories):
+def _cached_figure(cache_key, name, build):
+    """
+    Serve `build()` through the process-wide figure cache when a key is given;
+    a miss first looks for a pre-rendered snapshot of the view (prerender.py).
+    """
+    if cache_key is None:
+        return build()
+    return FIGURES.get_or_build((name, *cache_key), lambda: load_snapshot(name, cache_key) or build())
+
+def line_figure(f, ycol, title, eff_geos, eff_cats, separate_countries, separate_categories):
+    """(fig, color_mode) of a line view; no Streamlit calls (also used by prerender.py)."""
     fig, color_mode = _line_chart_logic(
-        f, "Annual inflation rate", "Annual inflation rate (YoY %)",
-        separate_countries, separate_categories, eff_geos, eff_cats
+        f, ycol, title, separate_countries, separate_categories, eff_geos, eff_cats
     )
-
     # Facet annotation cleanup when both dims are used
     if separate_countries and separate_categories:
         fig.for_each_annotation(lambda a: a.update(text=a.text.split("=")[-1], textangle=0))
+    return fig, color_mode
+
+def _render_line_tab(f, ycol, title, eff_geos, eff_cats, separate_countries, separate_categories,
+                     cache_key=None):
+    fig, color_mode = _cached_figure(cache_key, ycol, lambda: line_figure(
+        f, ycol, title, eff_geos, eff_cats, separate_countries, separate_categories))
 
     # decide scroll vs normal
     rows, cols = _facet_grid_dims(separate_countries, separate_categories, eff_geos, eff_cats)
@@ -96,46 +127,57 @@ def render_tab_annual(f, eff_geos, eff_cats, separate_countries, separate_catego
 
     render_country_category_matrix(eff_geos, eff_cats, color_mode=color_mode)
 
-def render_tab_monthly(f, eff_geos, eff_cats, separate_countries, separate_categories):
-    fig, color_mode = _line_chart_logic(
-        f, "Monthly inflation rate", "Monthly inflation rate (MoM %)",
-        separate_countries, separate_categories, eff_geos, eff_cats
-    )
-    if separate_countries and separate_categories:
-        fig.for_each_annotation(lambda a: a.update(text=a.text.split("=")[-1], textangle=0))
-
-    rows, cols = _facet_grid_dims(separate_countries, separate_categories, eff_geos, eff_cats)
-    use_scroll = (rows >= 3) or (cols >= 4) or (rows * cols >= 10)
+# metric column -> chart title of the three line views
+LINE_TITLES = {
+    "Annual inflation rate": "Annual inflation rate (YoY %)",
+    "Monthly inflation rate": "Monthly inflation rate (MoM %)",
+    "index": "Index (2015=100)",
+}
 
-    if use_scroll:
-        plot_scrollable(fig, cols=cols, rows=rows)
-    else:
-        st.plotly_chart(fig, use_container_width=True)
+def render_tab_annual(f, eff_geos, eff_cats, separate_countries, separate_categories, cache_key=None):
+    _render_line_tab(f, "Annual inflation rate", LINE_TITLES["Annual inflation rate"],
+                     eff_geos, eff_cats, separate_countries, separate_categories, cache_key)
 
-    render_country_category_matrix(eff_geos, eff_cats, color_mode=color_mode)
+def render_tab_monthly(f, eff_geos, eff_cats, separate_countries, separate_categories, cache_key=None):
+    _render_line_tab(f, "Monthly inflation rate", LINE_TITLES["Monthly inflation rate"],
+                     eff_geos, eff_cats, separate_countries, separate_categories, cache_key)
 
-def render_tab_index(f, eff_geos, eff_cats, separate_countries, separate_categories):
-    fig, color_mode = _line_chart_logic(
-        f, "index", "Index (2015=100)",
-        separate_countries, separate_categories, eff_geos, eff_cats
-    )
-    if separate_countries and separate_categories:
-        fig.for_each_annotation(lambda a: a.update(text=a.text.split("=")[-1], textangle=0))
+def render_tab_index(f, eff_geos, eff_cats, separate_countries, separate_categories, cache_key=None):
+    _render_line_tab(f, "index", LINE_TITLES["index"],
+                     eff_geos, eff_cats, separate_countries, separate_categories, cache_key)
 
-    rows, cols = _facet_grid_dims(separate_countries, separate_categories, eff_geos, eff_cats)
-    use_scroll = (rows >= 3) or (cols >= 4) or (rows * cols >= 10)
+RATE_LABELS = {"mom_%": "Monthly inflation rate", "yoy_%": "Annual inflation rate"}  # to_frame / latest
+RATE_CHOICE_LABELS = {"yoy_%": "Annual inflation rate", "mom_%": "Monthly inflation rate", "index": "Index"}
 
-    if use_scroll:
-        plot_scrollable(fig, cols=cols, rows=rows)
-    else:
-        st.plotly_chart(fig, use_container_width=True)
+def render_tab_derived(dataset, sel, f, params, cache_key=None):
+    """Any registered transform (transforms.py), computed for the selection and plotted like the index."""
+    c1, c2 = st.columns(2)
+    name = c1.selectbox("Metric", list(TRANSFORMS), format_func=lambda n: TRANSFORMS[n].label,
+                        key="derived_metric")
+    tr = TRANSFORMS[name]
+    kwargs, notes = {}, []
+    for pname, kind, default in tr.params:
+        if kind == "month":
+            label = c2.select_slider(pname.capitalize(), options=sel.month_labels, key=f"derived_{name}_{pname}")
+            kwargs[pname] = pd.Period(label, "M").to_timestamp()
+            notes.append(f"{pname} {label}")
+        else:
+            kwargs[pname] = c2.selectbox(pname.capitalize(), kind, index=kind.index(default),
+                                         format_func=lambda k: RATE_CHOICE_LABELS.get(k, k),
+                                         key=f"derived_{name}_{pname}")
+            notes.append(RATE_CHOICE_LABELS.get(kwargs[pname], kwargs[pname]))
 
-    render_country_category_matrix(eff_geos, eff_cats, color_mode=color_mode)
+    with span("derived", metric=name):
+        values = derived(dataset, name, params["eff_geos"], params["eff_cats"],
+                         params["dr_start"], params["dr_end"], **kwargs)
+    title = tr.label + (f" — {', '.join(notes)}" if notes else "")
+    _render_line_tab(f.assign(**{tr.label: sel.observed(values)}), tr.label, title,
+                     params["eff_geos"], params["eff_cats"],
+                     params["separate_countries"], params["separate_categories"],
+                     None if cache_key is None else (*cache_key, name, tuple(sorted(kwargs.items()))))
 
-def render_tab_latest_by_country(f):
-    f_flag = f.copy()
-    f_flag["geo_label"] = f_flag["geo_name"].astype(str).apply(with_flag)
-    last = f_flag.sort_values("date").groupby(["geo_label","coicop_name"], as_index=False).tail(1)
+def latest_by_country_figure(latest):
+    last = latest.assign(geo_label=latest["geo_name"].astype(str).map(with_flag))
     fig = px.bar(
         last, x="geo_label", y="Annual inflation rate",
         color="coicop_name", barmode="group",
@@ -143,12 +185,15 @@ def render_tab_latest_by_country(f):
         labels={"geo_label":"Country/Regions","coicop_name":"Categories"},
     )
     legend_bottom(fig)
+    return fig, None
+
+def render_tab_latest_by_country(latest, cache_key=None):
+    """`latest`: one row per series (HicpCube.latest with display rate names)."""
+    fig, _ = _cached_figure(cache_key, "latest_by_country", lambda: latest_by_country_figure(latest))
     st.plotly_chart(fig, use_container_width=True)
 
-def render_tab_by_category_latest(f):
-    f_flag = f.copy()
-    f_flag["geo_label"] = f_flag["geo_name"].astype(str).apply(with_flag)
-    last_cat = f_flag.sort_values("date").groupby(["coicop_name","geo_name"], as_index=False).tail(1)
+def by_category_latest_figure(latest):
+    last_cat = latest
     cmap = {g: COUNTRY_FLAG_COLORS.get(g, "#666666") for g in last_cat["geo_name"].unique()}
     fig = px.bar(
         last_cat, x="coicop_name", y="Annual inflation rate",
@@ -161,4 +206,58 @@ def render_tab_by_category_latest(f):
         tr.name = with_flag(tr.name)
         tr.legendgroup = tr.name
     legend_bottom(fig)
+    return fig, None
+
+def render_tab_by_category_latest(latest, cache_key=None):
+    """`latest`: one row per series (HicpCube.latest with display rate names)."""
+    fig, _ = _cached_figure(cache_key, "by_category_latest", lambda: by_category_latest_figure(latest))
+    st.plotly_chart(fig, use_container_width=True)
+
+def render_tab_contributions(agg, cache_key=None):
+    """`agg`: weights.Aggregates of the selection; stacked contributions per country."""
+    def build():
+        contrib = agg.contributions_frame()
+        n_geos = contrib["geo_name"].nunique()
+        fig = px.bar(
+            contrib, x="date", y="contribution", color="coicop_name", barmode="relative",
+            facet_row="geo_name" if n_geos > 1 else None,
+            color_discrete_sequence=CATEGORY_COLOR_SEQ,
+            title="Contributions to the annual inflation rate (percentage points)",
+            labels={"coicop_name":"Categories","geo_name":"Country/Regions","date":"Date",
+                    "contribution":"pp"},
+        )
+        fig.for_each_annotation(lambda a: a.update(text=a.text.split("=")[-1]))
+        legend_bottom(fig)
+        fig.update_layout(height=max(420, 260 * n_geos))
+        return fig, None
+
+    fig, _ = _cached_figure(cache_key, "contributions", build)
     st.plotly_chart(fig, use_container_width=True)
+
+QUALITY_TABLE_ROWS = 1_000  # rows shown per check; the report itself is complete
+
+def render_tab_quality(report):
+    """`report`: quality.QualityReport of the served version (computed once per version)."""
+    if report is None:
+        st.info("The data-quality report for this data version is not ready yet, or failed (see the log).")
+        return
+    summary = report.summary()
+    for col, (label, value) in zip(st.columns(len(summary)), summary.items()):
+        col.metric(label, f"{value:,}")
+    st.caption(f"{report.series:,} series · {report.cells:,} observations · checked in {report.seconds:.2f}s · "
+               + (f"revisions against version `{report.previous}`" if report.previous
+                  else "no previous version to check revisions against"))
+    checks = (
+        ("Gaps and stale series", report.gaps),
+        ("Duplicate cells (the last row is used)", report.duplicates),
+        ("Monthly-rate outliers vs. the seasonal and local norm (robust z-score, largest first)", report.outliers),
+        ("Revised index values", report.revisions),
+    )
+    for title, frame in checks:
+        st.subheader(title)
+        if frame.empty:
+            st.caption("None found.")
+            continue
+        if len(frame) > QUALITY_TABLE_ROWS:
+            st.caption(f"First {QUALITY_TABLE_ROWS:,} of {len(frame):,}.")
+        st.dataframe(frame.head(QUALITY_TABLE_ROWS), use_container_width=True, hide_index=True)
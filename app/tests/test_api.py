@@ -0,0 +1,82 @@
+# test_api.py — ETag / 304, gzip and the Arrow stream of the ASGI API
+import asyncio
+import gzip
+import json
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from api import ARROW_STREAM, GZIP_MIN_BYTES, RESPONSES, HicpApi
+from cube import HicpCube
+from refresh import DatasetVersion
+
+def _api(version: str = "v1") -> HicpApi:
+    """Two geos x two COICOPs over 2019-01..2021-12, served as `version`."""
+    months = pd.date_range("2019-01", periods=36, freq="MS")
+    index = 100.0 + np.arange(4 * 36, dtype=float).reshape(2, 2, 36) / 10.0
+    cube = HicpCube.from_values(np.array(["DE", "FR"], dtype=object), np.array(["Germany", "France"], dtype=object),
+                                np.array(["CP00", "CP01"], dtype=object), np.array(["All-items", "Food"], dtype=object),
+                                months, index, version=version)
+    return HicpApi(live=SimpleNamespace(state=DatasetVersion(cube, (0, 0), 0.0)))
+
+def _get(app, path: str, query: str = "", **headers) -> tuple:
+    """(status, headers, body) of one GET through the ASGI interface."""
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": path, "query_string": query.encode(),
+             "headers": [(k.replace("_", "-").encode(), v.encode()) for k, v in headers.items()]}
+    asyncio.run(app(scope, receive, send))
+    return sent[0]["status"], dict(sent[0]["headers"]), sent[1]["body"]
+
+@pytest.fixture(autouse=True)
+def _fresh():
+    RESPONSES.clear()
+
+def test_matching_if_none_match_is_304_without_a_body():
+    app = _api()
+    status, headers, body = _get(app, "/v1/series", "geo=FR")
+    assert status == 200 and json.loads(body)["rows"] == 2 * 36
+    etag = headers[b"etag"]
+    status, headers, body = _get(app, "/v1/series", "geo=FR", if_none_match=etag.decode())
+    assert (status, headers[b"etag"], body) == (304, etag, b"")
+
+def test_etag_changes_with_the_query_and_the_data_version():
+    etag = _get(_api(), "/v1/series", "geo=FR")[1][b"etag"]
+    both = _get(_api(), "/v1/series", "geo=FR,DE")[1][b"etag"]
+    assert both != etag
+    assert _get(_api(), "/v1/series", "geo=DE&geo=FR")[1][b"etag"] == both  # order and form do not matter
+    assert _get(_api("v2"), "/v1/series", "geo=FR")[1][b"etag"] != etag
+    assert _get(_api("v2"), "/v1/series", "geo=FR", if_none_match=etag.decode())[0] == 200
+
+def test_large_bodies_are_gzipped_when_accepted():
+    app = _api()
+    plain = _get(app, "/v1/series")
+    assert len(plain[2]) >= GZIP_MIN_BYTES and b"content-encoding" not in plain[1]
+    status, headers, body = _get(app, "/v1/series", accept_encoding="gzip, br")
+    assert headers[b"content-encoding"] == b"gzip"
+    assert gzip.decompress(body) == plain[2]
+    assert headers[b"etag"] != plain[1][b"etag"]  # one ETag per representation
+
+def test_small_bodies_are_not_gzipped():
+    status, headers, body = _get(_api(), "/v1/meta", accept_encoding="gzip")
+    assert len(body) < GZIP_MIN_BYTES and b"content-encoding" not in headers
+    assert json.loads(body)["version"] == "v1"
+
+def test_arrow_stream_has_the_json_rows():
+    app = _api()
+    status, headers, body = _get(app, "/v1/series", "geo=DE&start=2021-01", accept=ARROW_STREAM)
+    assert headers[b"content-type"] == ARROW_STREAM.encode()
+    table = pa.ipc.open_stream(body).read_all()
+    assert table.num_rows == 2 * 12 and set(table.column("geo").to_pylist()) == {"DE"}
+
+def test_unknown_route_is_404():
+    assert _get(_api(), "/v1/nope")[0] == 404
@@ -0,0 +1,51 @@
+# test_cube.py — calendar-aware rates and the cube snapshot
+import numpy as np
+import pandas as pd
+import pytest
+
+from cube import HicpCube
+import loader
+
+def _frame(months: dict) -> pd.DataFrame:
+    """One FR / CP00 series: {"YYYY-MM": index}."""
+    dates = pd.to_datetime(list(months))
+    return pd.DataFrame({
+        "year": dates.year, "month": dates.month, "geo": "FR", "geo_name": "France",
+        "coicop": "CP00", "coicop_name": "All-items HICP", "index": list(months.values()),
+    })
+
+def _rate(cube, values, month: str) -> float:
+    return values[0, 0, cube.month_offset(pd.Timestamp(month))]
+
+def test_missing_month_does_not_shift_the_yoy_baseline():
+    # 2021-01..2022-03 with 2021-06 missing: row-based pct_change(12) would compare
+    # 2022-02 with 2021-03 instead of 2021-02
+    months = {f"{d:%Y-%m}": 100.0 + i for i, d in enumerate(pd.date_range("2021-01", "2022-03", freq="MS"))}
+    del months["2021-06"]
+    cube = HicpCube.from_frame(_frame(months))
+
+    assert len(cube.months) == 15 and np.isnan(cube.index[0, 0, 5])
+    assert _rate(cube, cube.yoy, "2022-02") == pytest.approx((113.0 / 101.0 - 1) * 100)
+    assert _rate(cube, cube.yoy, "2022-03") == pytest.approx((114.0 / 102.0 - 1) * 100)
+
+def test_rates_next_to_a_gap_are_missing_not_bridged():
+    months = {"2021-01": 100.0, "2021-02": 101.0, "2021-04": 103.0, "2021-05": 104.0}
+    cube = HicpCube.from_frame(_frame(months))
+
+    assert _rate(cube, cube.mom, "2021-02") == pytest.approx(1.0)
+    assert np.isnan(_rate(cube, cube.mom, "2021-03"))
+    assert np.isnan(_rate(cube, cube.mom, "2021-04"))  # not 2021-04 vs 2021-02
+    assert _rate(cube, cube.mom, "2021-05") == pytest.approx((104.0 / 103.0 - 1) * 100)
+
+def test_snapshot_round_trips_the_cube(tmp_path):
+    csv = tmp_path / "hicp.csv"
+    _frame({"2021-01": 100.0, "2021-03": 102.0, "2022-01": 105.0}).rename(
+        columns={v: k for k, v in loader.COLUMN_MAP.items()}).to_csv(csv, index=False)
+    built = loader.load_cube(csv)
+    assert loader.snapshot_path(csv).is_file()
+
+    again = loader.load_cube(csv)
+    assert again.version == built.version and again.months.equals(built.months)
+    for name in ("index", "mom", "yoy", "last_obs"):
+        np.testing.assert_array_equal(getattr(again, name), getattr(built, name))
+    assert list(again.geo_names) == ["France"] and list(again.coicops) == ["CP00"]
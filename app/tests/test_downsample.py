@@ -0,0 +1,33 @@
+# test_downsample.py — min/max buckets within the point budget, one marker per gap
+import numpy as np
+import pandas as pd
+
+from downsample import minmax_downsample
+
+def _frame(series: dict) -> pd.DataFrame:
+    """{name: y values}, one row per month from 2000-01."""
+    return pd.concat([pd.DataFrame({
+        "geo_name": name, "coicop_name": "x",
+        "date": pd.date_range("2000-01", periods=len(y), freq="MS"), "y": y,
+    }) for name, y in series.items()], ignore_index=True)
+
+def _runs(y: np.ndarray) -> int:
+    nan = np.isnan(y)
+    return int((nan & ~np.r_[False, nan[:-1]]).sum())
+
+def test_a_long_gap_keeps_one_marker_within_the_budget():
+    y = np.sin(np.arange(500) / 7.0)
+    y[150:251] = np.nan   # a 101-month gap
+    y[400] = np.nan       # a one-month gap inside a bucket of values
+    out = minmax_downsample(_frame({"A": y}), "y", 240)
+
+    assert len(out) <= 240
+    kept = out["y"].to_numpy()
+    assert np.isnan(kept).sum() == 2 and _runs(kept) == 2  # neither gap is bridged
+    assert kept[~np.isnan(kept)].max() == np.nanmax(y) and kept[0] == y[0] and kept[-1] == y[-1]
+
+def test_short_series_are_kept_whole_and_many_gaps_stay_capped():
+    y = np.where(np.arange(1000) % 2, np.nan, np.arange(1000.0))  # 500 one-month gaps
+    out = minmax_downsample(_frame({"A": y, "B": np.arange(50.0)}), "y", 240)
+    assert len(out[out["geo_name"] == "B"]) == 50
+    assert len(out[out["geo_name"] == "A"]) <= 240
@@ -0,0 +1,59 @@
+# test_export.py — every download format round-trips the filtered table
+import gzip
+import io
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from cube import HicpCube
+from export import EXPORT_COLUMNS, FORMATS, export_file, filtered_table, iter_batches
+
+def _cube() -> HicpCube:
+    """FR / DE x CP00 / CP01 over 2020-01..2021-06, FR / CP01 missing in 2020-05."""
+    months = pd.date_range("2020-01", periods=18, freq="MS")
+    index = 100.0 + np.arange(4 * 18, dtype=float).reshape(2, 2, 18) / 7.0
+    index[1, 1, 4] = np.nan
+    return HicpCube.from_values(np.array(["FR", "DE"], dtype=object), np.array(["France", "Germany"], dtype=object),
+                                np.array(["CP00", "CP01"], dtype=object), np.array(["All-items", "Food"], dtype=object),
+                                months, index)
+
+def _read(data: bytes, fmt: str) -> pd.DataFrame:
+    if fmt == "CSV":
+        return pd.read_csv(io.BytesIO(data), parse_dates=["Date"])
+    if fmt == "CSV (gzip)":
+        return pd.read_csv(io.BytesIO(gzip.decompress(data)), parse_dates=["Date"])
+    if fmt == "Parquet":
+        return pq.read_table(io.BytesIO(data)).to_pandas()
+    return pa.ipc.open_file(pa.BufferReader(data)).read_all().to_pandas()
+
+def test_table_has_one_row_per_observed_cell_in_screen_order():
+    cube = _cube()
+    table = filtered_table(cube)
+    assert list(table.columns) == EXPORT_COLUMNS
+    assert len(table) == int((~np.isnan(cube.index)).sum()) == 4 * 18 - 1
+    assert table[["Date", "Country/Regions", "Categories"]].head(4).values.tolist() == [
+        [pd.Timestamp("2020-01-01"), g, c] for g in ("France", "Germany") for c in ("All-items", "Food")]
+
+def test_month_blocks_concatenate_to_the_table():
+    cube = _cube()
+    parts = list(iter_batches(cube, rows_per_batch=5))
+    assert len(parts) > 1
+    pd.testing.assert_frame_equal(pd.concat(parts, ignore_index=True), filtered_table(cube))
+
+@pytest.mark.parametrize("fmt", list(FORMATS))
+def test_every_format_round_trips(fmt):
+    cube = _cube()
+    expected = filtered_table(cube)
+    got = _read(export_file(cube, fmt), fmt)
+    assert list(got.columns) == EXPORT_COLUMNS and len(got) == len(expected)
+    assert pd.to_datetime(got["Date"]).tolist() == expected["Date"].tolist()
+    assert got["Country/Regions"].tolist() == expected["Country/Regions"].tolist()
+    np.testing.assert_allclose(got["Annual inflation rate"].to_numpy(float),
+                               expected["Annual inflation rate"].to_numpy(float), equal_nan=True)
+
+def test_unknown_format_is_refused():
+    with pytest.raises(ValueError):
+        export_file(_cube(), "XLSX")
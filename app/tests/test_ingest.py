@@ -0,0 +1,65 @@
+# test_ingest.py — incremental append against the offline JSON-stat stub
+import json
+import threading
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import jsonstat_stub
+from ingest import CSV_COLUMNS, decode_jsonstat, latest_stored_month, to_csv_layout, update_csv
+
+FIXTURES = Path(__file__).parent / "fixtures"  # FR, DE x CP00, CP01, 2024-01..2025-08 of the bundled CSV
+SERIES = dict(geos=("FR", "DE"), coicops=("CP00", "CP01"))
+
+@pytest.fixture
+def stub_url():
+    server = jsonstat_stub.serve(FIXTURES, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+def _recorded() -> pd.DataFrame:
+    doc = json.loads((FIXTURES / "prc_hicp_midx.json").read_text(encoding="utf-8"))
+    return to_csv_layout(decode_jsonstat(doc))
+
+def _sorted(df: pd.DataFrame) -> pd.DataFrame:
+    return df.sort_values(["[Year]", "[Month]", "[geo]", "[COICOP]"]).reset_index(drop=True)
+
+def test_update_csv_appends_only_the_new_months(tmp_path, stub_url):
+    recorded = _recorded()
+    csv = tmp_path / "hicp.csv"
+    old = recorded[recorded["[Year]"] * 12 + recorded["[Month]"] <= 2025 * 12 + 3]
+    old.to_csv(csv, index=False, encoding="utf-8", lineterminator="\r\n")
+
+    appended = update_csv(csv, base_url=stub_url, max_workers=2, geo_chunk=1, **SERIES)
+
+    assert appended == len(recorded) - len(old) > 0
+    assert str(latest_stored_month(csv)) == "2025-08"
+    result = pd.read_csv(csv, encoding="utf-8")
+    assert list(result.columns) == CSV_COLUMNS
+    pd.testing.assert_frame_equal(_sorted(result), _sorted(recorded), check_dtype=False)
+
+    assert update_csv(csv, base_url=stub_url, **SERIES) == 0  # nothing newer on the stub
+    assert len(pd.read_csv(csv, encoding="utf-8")) == len(recorded)
+
+def test_update_csv_starts_a_missing_file(tmp_path, stub_url):
+    csv = tmp_path / "new.csv"
+    recorded = _recorded()
+    assert update_csv(csv, start="2025-01", base_url=stub_url, **SERIES) == (recorded["[Year]"] == 2025).sum()
+    assert str(latest_stored_month(csv)) == "2025-08"
+
+def test_update_csv_catches_up_a_lagging_series(tmp_path, stub_url):
+    recorded = _recorded()
+    ym = recorded["[Year]"] * 12 + recorded["[Month]"]
+    lagging = (recorded["[geo]"] == "FR") & (recorded["[COICOP]"] == "CP01")
+    old = recorded[(ym <= 2025 * 12 + 3) & ~(lagging & (ym > 2025 * 12 + 1))]  # FR/CP01 stops at 2025-01
+    csv = tmp_path / "hicp.csv"
+    old.to_csv(csv, index=False, encoding="utf-8", lineterminator="\r\n")
+
+    assert update_csv(csv, base_url=stub_url, **SERIES) == len(recorded) - len(old)
+    result = pd.read_csv(csv, encoding="utf-8")
+    assert not result.duplicated(["[Year]", "[Month]", "[geo]", "[COICOP]"]).any()
+    pd.testing.assert_frame_equal(_sorted(result), _sorted(recorded), check_dtype=False)
@@ -0,0 +1,51 @@
+# test_quality.py — outlier scoring against the seasonal and local norm, stale series
+import numpy as np
+import pandas as pd
+
+from cube import HicpCube
+from quality import STALE_MONTHS, find_gaps, find_outliers, find_revisions
+
+def _cube(mom: np.ndarray) -> HicpCube:
+    """One series whose monthly rates are `mom` (percent), from 100 in 2010-01."""
+    index = 100.0 * np.cumprod(np.r_[1.0, 1.0 + mom / 100.0])
+    months = pd.date_range("2010-01", periods=len(index), freq="MS")
+    names = np.array(["x"], dtype=object)
+    return HicpCube.from_values(names, names, names, names, months, index[None, None, :])
+
+def test_seasonal_pattern_and_a_persistent_surge_are_not_outliers():
+    rng = np.random.default_rng(0)
+    months = np.arange(1, 180) % 12
+    mom = 0.15 + rng.normal(0, 0.05, len(months))
+    mom[months == 0] -= 3.0           # January sales ...
+    mom[months == 2] += 3.0           # ... and the new collection in March
+    mom[120:150] += 1.0               # two and a half years of high inflation
+    assert find_outliers(_cube(mom)).empty
+
+def test_a_one_month_glitch_is_an_outlier():
+    mom = np.full(100, 0.2)
+    mom[60] = 8.0
+    out = find_outliers(_cube(mom))
+    assert list(out["date"]) == [pd.Timestamp("2015-02-01")]
+    assert out["robust_z"].iloc[0] > 3.5
+
+def test_release_lag_is_not_stale():
+    months = pd.date_range("2024-01", periods=24, freq="MS")
+    index = np.full((1, 4, 24), 100.0)
+    index[0, 1, -1:] = np.nan                   # one month behind: release lag
+    index[0, 2, -STALE_MONTHS:] = np.nan        # STALE_MONTHS behind
+    index[0, 3, 5] = np.nan                     # a hole, up to date
+    codes = np.array(["FR"], dtype=object), np.array(["a", "b", "c", "d"], dtype=object)
+    gaps = find_gaps(HicpCube.from_values(codes[0], codes[0], codes[1], codes[1], months, index))
+    assert gaps[["coicop", "missing", "stale"]].values.tolist() == [["c", 0, True], ["d", 1, False]]
+
+def test_revisions_align_by_code_and_month():
+    months = pd.date_range("2024-01", periods=6, freq="MS")
+    geos = np.array(["DE", "FR"], dtype=object), np.array(["FR"], dtype=object)
+    cp = np.array(["CP00"], dtype=object)
+    old = HicpCube.from_values(geos[0], geos[0], cp, cp, months, np.full((2, 1, 6), 100.0))
+    new_index = np.full((1, 1, 7), 100.0)  # DE dropped, a month added, one value revised
+    new_index[0, 0, 2] = 101.0
+    new = HicpCube.from_values(geos[1], geos[1], cp, cp, months.append(pd.DatetimeIndex(["2024-07-01"])),
+                               new_index)
+    rev = find_revisions(new, old)
+    assert rev[["geo", "date", "old", "new"]].values.tolist() == [["FR", pd.Timestamp("2024-03-01"), 100.0, 101.0]]
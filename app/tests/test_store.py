@@ -0,0 +1,50 @@
+# test_store.py — the Parquet store's select matches the in-memory cube's
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from loader import load_cube
+from store import ParquetStore, build_store
+
+DATA = Path(__file__).resolve().parents[1] / "data" / "data hicp.csv"
+
+@pytest.fixture(scope="module")
+def both(tmp_path_factory):
+    tmp = tmp_path_factory.mktemp("store")
+    csv = tmp / DATA.name
+    shutil.copy(DATA, csv)
+    return load_cube(csv), ParquetStore(build_store(csv, tmp / "hicp_store", chunk_rows=1000))
+
+def _assert_same(a, b):
+    assert list(a.geos) == list(b.geos) and list(a.coicops) == list(b.coicops)
+    assert a.months.equals(b.months)
+    for name in ("index", "mom", "yoy", "last_obs"):
+        np.testing.assert_array_equal(getattr(a, name), getattr(b, name), err_msg=name)
+
+def test_store_catalog_matches_the_cube(both):
+    cube, store = both
+    assert store.version == cube.version
+    assert list(store.geo_names) == list(cube.geo_names)
+    assert store.months.equals(cube.months)
+
+def test_window_starting_mid_range_has_complete_rates(both):
+    # the store reads RATE_LOOKBACK months before `start`, so MoM / YoY at the
+    # window's first month are the same as in the whole cube
+    cube, store = both
+    geos, cats = list(cube.geo_names[:3]), list(cube.coicop_names[:2])
+    start, end = cube.months[14], cube.months[-3]
+    got = store.select(geos, cats, start, end)
+    _assert_same(got, cube.select(geos, cats, start, end))
+    assert not np.isnan(got.yoy[..., 0]).all()
+
+def test_select_all_matches(both):
+    cube, store = both
+    _assert_same(store.select(), cube.select())
+
+def test_scan_covers_every_geo_once(both):
+    cube, store = both
+    blocks = list(store.scan(block=4))
+    assert [g for b in blocks for g in b.geos] == list(cube.geos)
+    np.testing.assert_array_equal(np.concatenate([b.index for b in blocks]), cube.index)
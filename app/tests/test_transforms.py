@@ -0,0 +1,49 @@
+# test_transforms.py — derived series: lookback before the window, rebasing
+import numpy as np
+import pandas as pd
+import pytest
+
+from cube import HicpCube
+from transforms import DERIVED, derived
+
+def _cube(index: np.ndarray, first: str = "2019-01") -> HicpCube:
+    """One FR / CP00 series of `index` values from `first`."""
+    months = pd.date_range(first, periods=len(index), freq="MS")
+    return HicpCube.from_values(np.array(["FR"], dtype=object), np.array(["France"], dtype=object),
+                                np.array(["CP00"], dtype=object), np.array(["All-items"], dtype=object),
+                                months, np.asarray(index, float)[None, None, :], version="t")
+
+@pytest.fixture(autouse=True)
+def _fresh():
+    DERIVED.clear()
+
+def test_ma12_reads_the_lookback_so_the_window_starts_complete():
+    cube = _cube(np.arange(36) + 100.0)  # 2019-01..2021-12
+    out = derived(cube, "ma12", ["France"], ["All-items"], "2021-01", "2021-12", of="index")
+    assert out.shape == (1, 1, 12)
+    # 2021-01 averages 2020-02..2021-01, all before the window but the last
+    assert out[0, 0, 0] == pytest.approx(np.mean(np.arange(13, 25) + 100.0))
+    assert not np.isnan(out).any()
+
+def test_ma12_is_missing_where_a_month_of_the_12_is():
+    index = np.arange(36) + 100.0
+    index[20] = np.nan  # 2020-09
+    out = derived(_cube(index), "ma12", None, None, "2021-01", None, of="index")
+    assert np.isnan(out[0, 0, :8]).all()  # windows covering 2020-09 end at 2021-08
+    assert not np.isnan(out[0, 0, 8:]).any()
+
+def test_rebase_sets_the_base_month_to_100():
+    cube = _cube(np.linspace(90.0, 120.0, 24))
+    out = derived(cube, "rebase", None, None, "2019-06", None, base=pd.Timestamp("2020-01"))
+    base = cube.index[0, 0, 12]
+    assert out[0, 0, 12 - 5] == pytest.approx(100.0)
+    np.testing.assert_allclose(out[0, 0], cube.index[0, 0, 5:] / base * 100.0)
+
+def test_rebase_defaults_to_the_first_month_of_the_window():
+    cube = _cube(np.linspace(90.0, 120.0, 24))
+    out = derived(cube, "rebase", None, None, "2019-06", None)
+    assert out[0, 0, 0] == pytest.approx(100.0)
+
+def test_derived_is_read_only():
+    out = derived(_cube(np.arange(24) + 100.0), "ann3m", None, None, None, None)
+    assert not out.flags.writeable
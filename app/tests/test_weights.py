@@ -0,0 +1,72 @@
+# test_weights.py — weighted aggregates, contributions and the double-counting skips
+import numpy as np
+import pandas as pd
+import pytest
+
+from cube import HicpCube
+from weights import HicpWeights, aggregate, components_of
+
+def _cube(yoy: dict, coicops=("CP00",)) -> HicpCube:
+    """Series growing by `yoy[(geo, coicop)]` percent over 2020-01..2021-01."""
+    geos = sorted({g for g, _ in yoy})
+    index = np.full((len(geos), len(coicops), 13), np.nan)
+    for (g, c), rate in yoy.items():
+        index[geos.index(g), coicops.index(c)] = np.linspace(100.0, 100.0 + rate, 13)
+    months = pd.date_range("2020-01", periods=13, freq="MS")
+    return HicpCube.from_values(np.array(geos, dtype=object), np.array(geos, dtype=object),
+                                np.array(coicops, dtype=object), np.array(coicops, dtype=object), months, index)
+
+def _weights(rows) -> HicpWeights:
+    """rows: (geo, coicop or None, weight) for 2020."""
+    return HicpWeights.from_frame(pd.DataFrame(
+        [(2020, g, c, w) for g, c, w in rows], columns=["year", "geo", "coicop", "weight"]))
+
+WEIGHTS = _weights([("EU27_2020", "CP00", 1000.0), ("DE", "CP00", 1000.0), ("FR", "CP00", 1000.0),
+                    ("DE", None, 300.0), ("FR", None, 200.0)])
+
+def _total(cube, weights=WEIGHTS) -> float:
+    return aggregate(cube, weights).total["yoy_%"][-1]
+
+def test_eu_weighs_the_sum_of_its_members():
+    _, country = WEIGHTS.aligned(_cube({("EU27_2020", "CP00"): 1.0, ("DE", "CP00"): 1.0}))
+    assert country[:, -1].tolist() == [300.0, 500.0]  # DE, EU27_2020
+
+def test_eu_with_a_member_counts_the_member_once():
+    cube = _cube({("EU27_2020", "CP00"): 10.0, ("DE", "CP00"): 2.0})
+    assert _total(cube) == pytest.approx(2.0)
+    agg = aggregate(cube, WEIGHTS)
+    assert agg.by_coicop["yoy_%"][0, -1] == pytest.approx(2.0)
+
+def test_eu_with_members_is_their_country_weighted_mean():
+    cube = _cube({("EU27_2020", "CP00"): 10.0, ("DE", "CP00"): 2.0, ("FR", "CP00"): 4.0})
+    assert _total(cube) == pytest.approx((300 * 2.0 + 200 * 4.0) / 500)
+
+def test_eu_alone_is_its_own_rate():
+    assert _total(_cube({("EU27_2020", "CP00"): 10.0})) == pytest.approx(10.0)
+
+def test_components_follow_the_hierarchy_and_special_aggregates():
+    codes = ["CP00", "CP01", "CP011", "CP04", "CP045", "NRG", "SERV", "CP041", "TOT_X_NRG", "GD"]
+    m = components_of(codes)
+    parts = {a: {codes[j] for j in np.flatnonzero(m[i])} for i, a in enumerate(codes)}
+    assert parts["CP00"] == set(codes) - {"CP00"}
+    assert parts["CP01"] == {"CP011"}
+    assert parts["NRG"] == {"CP045"}
+    assert parts["SERV"] == {"CP041"}
+    assert parts["TOT_X_NRG"] == {"CP01", "CP011", "SERV", "CP041"}  # not CP04: its energy is excluded
+    assert parts["GD"] == {"CP01", "CP011", "CP045", "NRG"}         # not CP04: rents are services
+    assert not m[:, codes.index("CP00")].any()
+
+def test_aggregate_is_skipped_where_its_components_are_observed():
+    w = _weights([("FR", "CP00", 1000.0), ("FR", "NRG", 100.0), ("FR", "TOT_X_NRG", 900.0)])
+    both = _cube({("FR", "CP00"): 9.0, ("FR", "NRG"): 30.0, ("FR", "TOT_X_NRG"): 2.0},
+                 coicops=("CP00", "NRG", "TOT_X_NRG"))
+    assert _total(both, w) == pytest.approx(0.1 * 30.0 + 0.9 * 2.0)
+    alone = _cube({("FR", "CP00"): 9.0}, coicops=("CP00", "NRG", "TOT_X_NRG"))
+    assert _total(alone, w) == pytest.approx(9.0)
+
+def test_contributions_are_item_share_times_yoy():
+    w = _weights([("FR", "CP00", 1000.0), ("FR", "NRG", 100.0)])
+    cube = _cube({("FR", "CP00"): 3.0, ("FR", "NRG"): 20.0}, coicops=("CP00", "NRG"))
+    frame = aggregate(cube, w).contributions_frame()
+    last = frame[frame["date"] == cube.months[-1]]
+    assert last[["coicop_name", "contribution"]].values.tolist() == [["NRG", pytest.approx(2.0)]]
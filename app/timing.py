@@ -0,0 +1,127 @@
+# timing.py — per-rerun stage timing, counters and opt-in profiling
+"""
+Stages are wrapped with `span(name)`; when timing is off for the current rerun
+`span` returns a shared no-op object, so instrumented code pays one ContextVar
+lookup. Enable with HICP_TIMING=1 or the `?debug=1` query parameter.
+"""
+from __future__ import annotations
+import contextvars
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import time
+from dataclasses import dataclass, field
+
+log = logging.getLogger("hicp.timing")
+if not log.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    log.addHandler(_handler)
+    log.setLevel(logging.INFO)
+    log.propagate = False
+
+ENV_FLAG = "HICP_TIMING"
+PROFILE_DIR_ENV = "HICP_PROFILE_DIR"  # optional: also dump .prof files here
+
+@dataclass
+class Rerun:
+    session_id: str
+    started: float = field(default_factory=time.perf_counter)
+    spans: list = field(default_factory=list)
+    total_ms: float | None = None
+    profiler: cProfile.Profile | None = None
+    profile_text: str | None = None
+
+_current: contextvars.ContextVar = contextvars.ContextVar("hicp_rerun", default=None)
+
+class _Span:
+    __slots__ = ("rerun", "name", "counters", "t0")
+
+    def __init__(self, rerun, name, counters):
+        self.rerun, self.name, self.counters = rerun, name, counters
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        ms = (time.perf_counter() - self.t0) * 1e3
+        self.rerun.spans.append(dict(stage=self.name, ms=round(ms, 3), **self.counters))
+        return False
+
+    def count(self, **counters):
+        """Attach row/byte counters to the span."""
+        self.counters.update(counters)
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def count(self, **counters):
+        pass
+
+_NOOP = _NoopSpan()
+
+def span(name: str, **counters):
+    rerun = _current.get()
+    return _NOOP if rerun is None else _Span(rerun, name, dict(counters))
+
+def enabled_by_env() -> bool:
+    return os.environ.get(ENV_FLAG, "").lower() in ("1", "true", "yes")
+
+def begin(session_id: str, enabled: bool, profile: bool = False) -> Rerun | None:
+    """Start collecting for this rerun (no-op unless `enabled`)."""
+    if not enabled:
+        _current.set(None)
+        return None
+    rerun = Rerun(session_id)
+    if profile:
+        prof = cProfile.Profile()
+        try:
+            prof.enable()
+            rerun.profiler = prof
+        except ValueError:
+            rerun.profile_text = "another profiler is active in this process; try again"
+    _current.set(rerun)
+    return rerun
+
+def finish() -> Rerun | None:
+    """Close the rerun, emit one JSON log line and return the collected data."""
+    rerun = _current.get()
+    if rerun is None:
+        return None
+    _current.set(None)
+    rerun.total_ms = round((time.perf_counter() - rerun.started) * 1e3, 3)
+    if rerun.profiler is not None:
+        rerun.profiler.disable()
+        out = io.StringIO()
+        pstats.Stats(rerun.profiler, stream=out).sort_stats("cumulative").print_stats(30)
+        rerun.profile_text = out.getvalue()
+        folder = os.environ.get(PROFILE_DIR_ENV)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+            rerun.profiler.dump_stats(os.path.join(folder, f"{rerun.session_id}-{int(time.time())}.prof"))
+    log.info(json.dumps(dict(event="rerun", session=rerun.session_id,
+                             total_ms=rerun.total_ms, spans=rerun.spans)))
+    return rerun
+
+def render_timing_panel(rerun: Rerun | None) -> None:
+    """Sidebar debug panel with the stage table of the rerun that just finished."""
+    if rerun is None:
+        return
+    import pandas as pd
+    import streamlit as st
+    with st.sidebar.expander(f"Timing — {rerun.total_ms:,.1f} ms", expanded=True):
+        st.dataframe(pd.DataFrame(rerun.spans), hide_index=True, use_container_width=True)
+        st.button("Profile one rerun (cProfile)", key="hicp_profile_button",
+                  on_click=lambda: st.session_state.update(hicp_profile_next=True))
+        if rerun.profile_text:
+            st.code(rerun.profile_text, language="text")
@@ -0,0 +1,106 @@
+# transforms.py — registry of derived series, computed on demand per selection
+"""
+A transform maps a cube's (geo, coicop, month) arrays to a new (G, C, T)
+array along the month axis. `derived()` evaluates it only for the selected
+series and window, reading `lookback` extra months before the window so
+rolling values are complete at its start, and memoizes the result by
+(data version, transform, params, series, window) in a bounded LRU.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from cube import RATE_GUARD
+from lru import LRUCache
+
+@dataclass(frozen=True)
+class Transform:
+    name: str
+    label: str            # column name / axis title of the derived series
+    compute: Callable     # (cube, **params) -> float (G, C, T) on the cube's months
+    lookback: int = 0     # months needed before the window
+    params: tuple = ()    # (name, kind, default): kind "month" (a "YYYY-MM" label) or a tuple of choices
+
+TRANSFORMS: dict = {}
+DERIVED = LRUCache(maxsize=64)
+
+def register(name: str, label: str, lookback: int = 0, params=()):
+    """Decorator adding `fn(cube, **params)` to TRANSFORMS under `name`."""
+    def deco(fn):
+        TRANSFORMS[name] = Transform(name, label, fn, lookback, tuple(params))
+        return fn
+    return deco
+
+def _month_value(cube, values: np.ndarray, month) -> np.ndarray:
+    """(G, C, 1) values at `month`, NaN if it is outside the cube's months."""
+    t = cube.month_offset(month)
+    if not 0 <= t < values.shape[-1]:
+        return np.full(values.shape[:-1] + (1,), np.nan)
+    return values[..., t:t + 1]
+
+@register("ann3m", "3-month annualized rate", lookback=3)
+def annualized_3m(cube) -> np.ndarray:
+    """((I_t / I_{t-3}) ** 4 - 1) * 100."""
+    v = cube.index
+    out = np.full(v.shape, np.nan)
+    if v.shape[-1] > 3:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out[..., 3:] = ((v[..., 3:] / v[..., :-3]) ** 4 - 1.0) * 100.0
+    out[np.abs(out) > RATE_GUARD] = np.nan
+    return out
+
+@register("ma12", "12-month moving average", lookback=11,
+          params=[("of", ("yoy_%", "mom_%", "index"), "yoy_%")])
+def moving_average_12m(cube, of: str = "yoy_%") -> np.ndarray:
+    """Trailing 12-month mean of `of`; NaN unless all 12 months are present."""
+    v = {"index": cube.index, "mom_%": cube.mom, "yoy_%": cube.yoy}[of]
+    out = np.full(v.shape, np.nan)
+    if v.shape[-1] >= 12:
+        ok = ~np.isnan(v)
+        zero = np.zeros(v.shape[:-1] + (1,))
+        s = np.concatenate([zero, np.cumsum(np.where(ok, v, 0.0), axis=-1)], axis=-1)
+        n = np.concatenate([zero, np.cumsum(ok, axis=-1)], axis=-1)
+        full = (n[..., 12:] - n[..., :-12]) == 12
+        out[..., 11:] = np.where(full, (s[..., 12:] - s[..., :-12]) / 12.0, np.nan)
+    return out
+
+@register("rebase", "Index (base month = 100)", params=[("base", "month", None)])
+def rebase(cube, base=None) -> np.ndarray:
+    """I_t / I_base * 100 (base defaults to the first month of the window)."""
+    base = cube.months[0] if base is None else base
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return cube.index / _month_value(cube, cube.index, base) * 100.0
+
+@register("cumulative", "Cumulative change since (%)", params=[("since", "month", None)])
+def cumulative_change(cube, since=None) -> np.ndarray:
+    """(I_t / I_since - 1) * 100; NaN before `since`."""
+    since = cube.months[0] if since is None else since
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = (cube.index / _month_value(cube, cube.index, since) - 1.0) * 100.0
+    out[..., :max(cube.month_offset(since), 0)] = np.nan
+    return out
+
+def derived(dataset, name: str, geo_names, coicop_names, start=None, end=None, **params) -> np.ndarray:
+    """
+    Transform `name` for the selection `dataset.select(geo_names, coicop_names,
+    start, end)`, aligned with that selection's arrays. Read-only, memoized.
+    """
+    tr = TRANSFORMS[name]
+    key = (dataset.version, name, tuple(sorted(params.items())),
+           None if geo_names is None else tuple(geo_names),
+           None if coicop_names is None else tuple(coicop_names), start, end)
+
+    def build():
+        sel = dataset.select(geo_names, coicop_names, start, end)
+        ext = sel
+        if tr.lookback and start is not None:
+            ext = dataset.select(geo_names, coicop_names,
+                                 pd.Timestamp(start) - pd.DateOffset(months=tr.lookback), end)
+        out = tr.compute(ext, **params)[..., len(ext.months) - len(sel.months):]
+        out.flags.writeable = False
+        return out
+
+    return DERIVED.get_or_build(key, build)
@@ -0,0 +1,227 @@
+# weights.py — HICP item / country weights, weighted aggregates and contributions
+"""
+Optional companion to the index CSV: annual weights from Eurostat
+`prc_hicp_inw` (item weights, per mille of each country's all-items HICP) and
+`prc_hicp_cow` (country weights, per mille of the EU aggregate), in
+
+    [Year],[geo],[COICOP],[Weight]
+
+Country-weight rows leave [COICOP] empty. `python ingest.py --weights` writes
+this file. Everything here is computed for all months of a selection at once
+with array ops over the cube axes.
+"""
+from __future__ import annotations
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from cube import take_padded
+from lru import LRUCache
+
+PER_MILLE = 1000.0
+WEIGHT_COLUMNS = {"[Year]": "year", "[geo]": "geo", "[COICOP]": "coicop", "[Weight]": "weight"}
+
+_EA19 = ("AT", "BE", "CY", "DE", "EE", "EL", "ES", "FI", "FR", "IE", "IT", "LT", "LU", "LV", "MT", "NL",
+         "PT", "SI", "SK")
+_EU27 = (*_EA19, "BG", "CZ", "DK", "HR", "HU", "PL", "RO", "SE")
+DIVISIONS = tuple(f"CP{d:02d}" for d in range(1, 13))
+_NRG = ("CP045", "CP0722")   # electricity, gas & other fuels; fuels for personal transport
+_FOOD = ("CP01", "CP02")     # food, alcohol & tobacco
+_SERV = ("CP0314", "CP0322", "CP041", "CP0432", "CP044", "CP0513", "CP0533", "CP0562", "CP062", "CP063",
+         "CP0723", "CP0724", "CP073", "CP081", "CP083", "CP0915", "CP0923", "CP094", "CP096", "CP10", "CP11",
+         "CP1211", "CP124", "CP125", "CP126", "CP127")
+# COICOP aggregates -> (included, excluded) code prefixes; other codes cover their own subtree
+COICOP_AGGREGATES = {
+    "CP00": (("CP",), ()),
+    "GD": (("CP",), _SERV),
+    "SERV": (_SERV, ()),
+    "NRG": (_NRG, ()),
+    "ELC_GAS": (("CP0451", "CP0452"), ()),
+    "FOOD": (_FOOD, ()),
+    "TOT_X_NRG": (("CP",), _NRG),
+    "TOT_X_NRG_FOOD": (("CP",), (*_NRG, *_FOOD)),
+    "TOT_X_TBC": (("CP",), ("CP022",)),
+}
+# geo aggregates -> member countries (Eurostat codes)
+GEO_AGGREGATES = {
+    "EU27_2020": _EU27,
+    "EU28": (*_EU27, "UK"),
+    "EA19": _EA19,
+    "EA20": (*_EA19, "HR"),
+    "EA": (*_EA19, "HR"),
+}
+
+@dataclass(frozen=True, eq=False)
+class HicpWeights:
+    """Annual weights on (geo, coicop, year) and (geo, year) axes; NaN where unknown."""
+    geos: np.ndarray
+    coicops: np.ndarray
+    years: np.ndarray
+    items: np.ndarray      # (G, C, Y) item weights, per mille
+    countries: np.ndarray  # (G, Y) country weights, per mille; NaN if not provided
+    version: str = ""
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, version: str = "") -> "HicpWeights":
+        """Long frame (year, geo, coicop, weight); rows without coicop are country weights."""
+        g_idx, geos = pd.factorize(df["geo"].astype(str), sort=True)
+        y_idx, years = pd.factorize(df["year"].to_numpy("int64"), sort=True)
+        is_item = df["coicop"].notna().to_numpy()
+        c_idx, coicops = pd.factorize(df.loc[is_item, "coicop"].astype(str), sort=True)
+        w = df["weight"].to_numpy(float)
+
+        items = np.full((len(geos), len(coicops), len(years)), np.nan)
+        items[g_idx[is_item], c_idx, y_idx[is_item]] = w[is_item]
+        countries = np.full((len(geos), len(years)), np.nan)
+        countries[g_idx[~is_item], y_idx[~is_item]] = w[~is_item]
+        return cls(np.asarray(geos, dtype=object), np.asarray(coicops, dtype=object),
+                   np.asarray(years), items, countries, version)
+
+    def aligned(self, cube) -> tuple:
+        """
+        (item share, country weight) on the cube's (geo, coicop, month) cells:
+        annual weights apply to every month of their year, and the last known
+        year's weights carry forward to later years (Eurostat publishes a
+        year's weights some weeks into it). A geo aggregate without a country
+        weight (e.g. the EU itself) weighs the sum of its members'; other geos
+        without one are NaN.
+        """
+        gi = pd.Index(self.geos).get_indexer(cube.geos)
+        ci = pd.Index(self.coicops).get_indexer(cube.coicops)
+        yi = np.searchsorted(self.years, np.asarray(cube.months.year), side="right") - 1  # -1: before the first
+        filled = _ffill(self.countries)
+        share = take_padded(_ffill(self.items), gi, ci, yi) / PER_MILLE
+        country = take_padded(filled, gi, yi)
+        # (cube geo, year): sum of the member countries' weights, NaN for non-aggregates
+        members = geo_members(cube.geos, self.geos)[:, :, None] & ~np.isnan(filled)[None]
+        summed = np.where(members.any(axis=1), np.where(members, filled[None], 0.0).sum(axis=1), np.nan)
+        return share, np.where(np.isnan(country), take_padded(summed, np.arange(len(gi)), yi), country)
+
+def _ffill(a: np.ndarray) -> np.ndarray:
+    """Carry the last known value forward along the last (year) axis."""
+    if not a.shape[-1]:
+        return a
+    idx = np.where(np.isnan(a), 0, np.arange(a.shape[-1]))
+    return np.take_along_axis(a, np.maximum.accumulate(idx, axis=-1), axis=-1)
+
+def geo_members(geos, countries) -> np.ndarray:
+    """(len(geos), len(countries)) mask: [a, b] when geo a is an aggregate (GEO_AGGREGATES) holding country b."""
+    countries = np.asarray(countries, dtype=object)
+    return np.array([np.isin(countries, GEO_AGGREGATES.get(str(g), ())) for g in geos],
+                    dtype=bool).reshape(len(geos), len(countries))
+
+def _coicop_parts(code: str) -> tuple:
+    """(included, excluded) COICOP prefixes of a code: COICOP_AGGREGATES, else the code's own subtree."""
+    return COICOP_AGGREGATES.get(code, ((code,), ()))
+
+def components_of(codes) -> np.ndarray:
+    """
+    (C, C) mask: [a, b] when COICOP code a is an aggregate of code b: everything
+    b covers is inside a (CP00 of every other code, CP01 of CP011, NRG of
+    CP045, TOT_X_NRG of FOOD, ...). Both are cut into "atoms", the prefixes of
+    the hierarchy table, the codes and the divisions; an atom is inside a code
+    when it falls under one of its included prefixes and neither under nor
+    above an excluded one.
+    """
+    codes = [str(c) for c in codes]
+    parts = [_coicop_parts(c) for c in codes]
+    atoms = np.array(sorted({p for inc, exc in parts for p in (*inc, *exc)}.union(DIVISIONS)))
+    owner_in = np.repeat(np.arange(len(codes)), [len(inc) for inc, _ in parts])
+    owner_ex = np.repeat(np.arange(len(codes)), [len(exc) for _, exc in parts])
+    inc = np.array([p for i, _ in parts for p in i], dtype=atoms.dtype)
+    exc = np.array([p for _, e in parts for p in e], dtype=atoms.dtype)
+
+    inside = np.zeros((len(codes), len(atoms)), dtype=bool)
+    np.logical_or.at(inside, owner_in, np.char.startswith(atoms[None, :], inc[:, None]))
+    cut = np.zeros((len(codes), len(atoms)), dtype=bool)
+    np.logical_or.at(cut, owner_ex, np.char.startswith(atoms[None, :], exc[:, None])
+                     | np.char.startswith(exc[:, None], atoms[None, :]))
+    inside &= ~cut
+    # a ⊇ b: no atom of b outside a
+    out = ~(inside[None, :, :] & ~inside[:, None, :]).any(axis=-1) & inside.any(axis=-1)[None, :]
+    np.fill_diagonal(out, False)
+    return out
+
+def read_weights(path: Path) -> pd.DataFrame:
+    df = pd.read_csv(path, encoding="utf-8", on_bad_lines="skip").rename(columns=WEIGHT_COLUMNS)
+    missing = set(WEIGHT_COLUMNS.values()).difference(df.columns)
+    if missing:
+        raise ValueError(f"Weights CSV missing required columns: {sorted(missing)}")
+    df["year"] = pd.to_numeric(df["year"], errors="coerce")
+    df["weight"] = pd.to_numeric(df["weight"], errors="coerce")
+    df["coicop"] = df["coicop"].where(df["coicop"].astype(str).str.strip() != "")
+    return df.dropna(subset=["year", "geo", "weight"])
+
+def load_weights(path: Path) -> HicpWeights | None:
+    """Weights from `path`, or None when the optional file is absent."""
+    path = Path(path)
+    if not path.is_file():
+        return None
+    info = os.stat(path)
+    return HicpWeights.from_frame(read_weights(path), version=f"{info.st_size}-{info.st_mtime_ns}")
+
+# ----- Aggregation -----
+def weighted_mean(values: np.ndarray, weights: np.ndarray, axis) -> np.ndarray:
+    """Weighted mean over `axis`, using only cells where both value and weight are known."""
+    ok = ~np.isnan(values) & ~np.isnan(weights) & (weights > 0)
+    num = np.where(ok, values * weights, 0.0).sum(axis=axis)
+    den = np.where(ok, weights, 0.0).sum(axis=axis)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = num / den
+    out[den == 0] = np.nan
+    return out
+
+@dataclass(frozen=True, eq=False)
+class Aggregates:
+    """Weighted rates and contributions of one selection, for every month at once."""
+    cube: object               # the HicpCube selection they were computed from
+    by_geo: dict               # rate -> (G, T): across the selected categories (see aggregate)
+    by_coicop: dict            # rate -> (C, T): across the selected geos (country weights, see aggregate)
+    total: dict                # rate -> (T,): across the whole selection (see aggregate)
+    contributions: np.ndarray  # (G, C, T): item share × YoY, percentage points
+    unweighted: tuple = ()     # names of the categories with series that have no weight (left out)
+
+    def contributions_frame(self, exclude=("CP00",)) -> pd.DataFrame:
+        """Long frame (date, geo_name, coicop_name, contribution) of the observed cells."""
+        keep = ~np.isin(self.cube.coicops, list(exclude))
+        g, c, t = np.nonzero(~np.isnan(self.contributions) & keep[None, :, None])
+        return pd.DataFrame({
+            "date": self.cube.months[t],
+            "geo_name": self.cube.geo_names[g],
+            "coicop_name": self.cube.coicop_names[c],
+            "contribution": self.contributions[g, c, t],
+        })
+
+def aggregate(cube, weights: HicpWeights) -> Aggregates:
+    """
+    Weighted MoM/YoY of a selection and each category's contribution to its
+    country's headline annual rate (item weight share × YoY; the chain-linking
+    of the official figures is not reproduced). Means skip an aggregate (CP00,
+    or the EU across geos) in the months where its selected components (the
+    COICOPs, or the member countries) are observed, which it would count twice.
+    """
+    share, country = weights.aligned(cube)
+    if len(cube.geos) == 1:
+        country = np.ones_like(country)  # a lone geo needs no country weight
+    cell = share * country[:, None, :]  # weight of a cell in an aggregate across geos
+    observed = ~np.isnan(cube.index)
+    covered = np.einsum("ab,gbt->gat", components_of(cube.coicops), observed, dtype=np.int64) > 0
+    geo_covered = np.einsum("ab,bct->act", geo_members(cube.geos, cube.geos), observed, dtype=np.int64) > 0
+    parts_share = np.where(covered, np.nan, share)
+    geo_cell = np.where(geo_covered, np.nan, cell)
+    parts_cell = np.where(covered, np.nan, geo_cell)
+    rates = {"mom_%": cube.mom, "yoy_%": cube.yoy}
+    missing = (observed.any(axis=2) & np.isnan(share).all(axis=2)).any(axis=0)
+    return Aggregates(
+        cube=cube,
+        by_geo={k: weighted_mean(v, parts_share, axis=1) for k, v in rates.items()},
+        by_coicop={k: weighted_mean(v, geo_cell, axis=0) for k, v in rates.items()},
+        total={k: weighted_mean(v, parts_cell, axis=(0, 1)) for k, v in rates.items()},
+        contributions=share * cube.yoy,
+        unweighted=tuple(cube.coicop_names[missing].tolist()),
+    )
+
+AGGREGATES = LRUCache(maxsize=32)  # (weights version, *selection key) -> Aggregates